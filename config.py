@@ -2,33 +2,131 @@
 Конфигурация бота - загрузка переменных окружения
 """
 import os
-from dotenv import load_dotenv
+import threading
+from typing import Annotated, FrozenSet, Optional
 
-# Загружаем переменные из .env файла
-load_dotenv()
+import pytz
+from dotenv import dotenv_values
+from pydantic import ConfigDict, Field
+from pydantic.dataclasses import dataclass
 
+# Обязательные переменные: если окружение уже их содержит (systemd/Docker), .env не читаем
+_REQUIRED_ENV = ("BOT_TOKEN", "MAIN_ADMIN_ID", "API_ID", "API_HASH", "PHONE_NUMBER")
 
+# Флаги, полностью отключающие чтение .env (продакшен с настоящими переменными окружения)
+_SKIP_DOTENV_FLAGS = ("PRODUCTION", "SKIP_DOTENV", "DOTENV_DISABLE")
 
+
+def _need_dotenv() -> bool:
+    """Нужно ли читать .env: не отключено флагом и не хватает обязательных переменных."""
+    if any(os.environ.get(flag) == "1" for flag in _SKIP_DOTENV_FLAGS):
+        return False
+    return not all(key in os.environ for key in _REQUIRED_ENV)
+
+
+# Загружаем переменные из .env файла (только один раз за процесс)
+if not globals().get("_DOTENV_LOADED"):
+    if _need_dotenv():
+        # Один вызов update вместо поштучной записи; уже заданные переменные не перезаписываем
+        os.environ.update({
+            key: value
+            for key, value in dotenv_values().items()
+            if key not in os.environ and value is not None
+        })
+    _DOTENV_LOADED = True
+
+
+# Обязательная непустая строка
+_Required = Annotated[str, Field(min_length=1)]
+
+
+@dataclass(frozen=True, slots=True, config=ConfigDict(arbitrary_types_allowed=True))
 class Config:
-    def __init__(self):
-        # === Aiogram Bot ===
-        self.BOT_TOKEN = os.getenv("BOT_TOKEN")
-        self.MAIN_ADMIN_ID = int(os.getenv("MAIN_ADMIN_ID", 0))
-        self.DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///giveaway_bot.db")
-        self.TIMEZONE = os.getenv("TIMEZONE", "Europe/Moscow")
-
-        # === Pyrogram Client ===
-        self.API_ID = os.getenv("API_ID")
-        self.API_HASH = os.getenv("API_HASH")
-        self.PHONE_NUMBER = os.getenv("PHONE_NUMBER")
-        self.SESSION_NAME = os.getenv("SESSION_NAME", "pyrogram_session")
-
-        # Проверки
-        if not self.BOT_TOKEN:
-            raise ValueError("BOT_TOKEN не найден!")
-        if not self.MAIN_ADMIN_ID:
-            raise ValueError("MAIN_ADMIN_ID не найден!")
-        if not self.API_ID or not self.API_HASH or not self.PHONE_NUMBER:
-            raise ValueError("Для Pyrogram нужны: API_ID, API_HASH, PHONE_NUMBER")
-
-config = Config()
\ No newline at end of file
+    """
+    Конфигурация бота. Значения читаются из окружения один раз и дальше не меняются.
+    Схема проверяется pydantic: все отсутствующие/некорректные переменные
+    попадают в один ValidationError (наследник ValueError).
+    """
+
+    # === Aiogram Bot ===
+    BOT_TOKEN: _Required
+    MAIN_ADMIN_ID: Annotated[int, Field(gt=0)]
+    DATABASE_URL: str
+    DB_POOL_SIZE: Annotated[int, Field(gt=0)]      # пул соединений для PostgreSQL/MySQL
+    DB_MAX_OVERFLOW: Annotated[int, Field(ge=0)]
+    DB_BATCH_SIZE: Annotated[int, Field(gt=0)]     # строк на один запрос в массовых операциях
+    TIMEZONE: str
+    TZ: pytz.BaseTzInfo        # объект часового пояса, создаётся один раз из TIMEZONE
+    ADMIN_IDS: FrozenSet[int]  # MAIN_ADMIN_ID + дополнительные ID из ADMIN_IDS (через запятую)
+
+    @property
+    def pyrogram(self) -> "PyrogramConfig":
+        """Настройки Pyrogram: читаются и проверяются только при первом обращении."""
+        return get_pyrogram_config()
+
+
+@dataclass(frozen=True, slots=True)
+class PyrogramConfig:
+    """Настройки Pyrogram Client (нужны только там, где реально запускается Pyrogram)."""
+
+    API_ID: _Required
+    API_HASH: _Required
+    PHONE_NUMBER: _Required
+    SESSION_NAME: str
+
+
+def _build() -> Config:
+    """Читает переменные окружения и собирает Config (валидация — в схеме Config)."""
+    main_admin_id = os.getenv("MAIN_ADMIN_ID")
+    timezone_name = os.getenv("TIMEZONE", "Europe/Moscow")
+    extra_admin_ids = (part.strip() for part in os.getenv("ADMIN_IDS", "").split(","))
+
+    return Config(
+        BOT_TOKEN=os.getenv("BOT_TOKEN"),
+        MAIN_ADMIN_ID=main_admin_id,
+        DATABASE_URL=os.getenv("DATABASE_URL", "sqlite:///giveaway_bot.db"),
+        DB_POOL_SIZE=os.getenv("DB_POOL_SIZE", "20"),
+        DB_MAX_OVERFLOW=os.getenv("DB_MAX_OVERFLOW", "40"),
+        DB_BATCH_SIZE=os.getenv("DB_BATCH_SIZE", "1000"),
+        TIMEZONE=timezone_name,
+        TZ=pytz.timezone(timezone_name),
+        ADMIN_IDS=[part for part in (main_admin_id, *extra_admin_ids) if part],
+    )
+
+
+def _build_pyrogram() -> PyrogramConfig:
+    """Читает переменные Pyrogram и собирает PyrogramConfig."""
+    return PyrogramConfig(
+        API_ID=os.getenv("API_ID"),
+        API_HASH=os.getenv("API_HASH"),
+        PHONE_NUMBER=os.getenv("PHONE_NUMBER"),
+        SESSION_NAME=os.getenv("SESSION_NAME", "pyrogram_session"),
+    )
+
+
+_INSTANCE: Optional[Config] = None
+_PYROGRAM_INSTANCE: Optional[PyrogramConfig] = None
+_LOCK = threading.Lock()
+
+
+def get_config() -> Config:
+    """Возвращает единственный экземпляр конфигурации (собирается при первом вызове)."""
+    global _INSTANCE
+    if _INSTANCE is None:
+        with _LOCK:
+            if _INSTANCE is None:
+                _INSTANCE = _build()
+    return _INSTANCE
+
+
+def get_pyrogram_config() -> PyrogramConfig:
+    """Возвращает настройки Pyrogram (собираются при первом вызове)."""
+    global _PYROGRAM_INSTANCE
+    if _PYROGRAM_INSTANCE is None:
+        with _LOCK:
+            if _PYROGRAM_INSTANCE is None:
+                _PYROGRAM_INSTANCE = _build_pyrogram()
+    return _PYROGRAM_INSTANCE
+
+
+config = get_config()
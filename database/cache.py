@@ -0,0 +1,267 @@
+"""
+Кэширование результатов запросов к БД (aiocache).
+
+cached_with_ttl — aiocache.cached с бэкендом FastMemCache по умолчанию:
+    @cached_with_ttl(ttl=30)
+    async def get_something(): ...
+
+Одновременные промахи по одному ключу выполняют запрос один раз (single-flight),
+а функции-писатели сбрасывают значение через await get_something.invalidate().
+
+register_prewarm(get_something, ttl=30) — прогрев кэша при старте бота
+и его обновление незадолго до истечения TTL, если значение читали с прошлого
+прогрева (prewarm.start() в main.py).
+"""
+import asyncio
+import hashlib
+import logging
+import pickle
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+from aiocache import cached
+from aiocache.base import SENTINEL, BaseCache
+from aiocache.serializers import NullSerializer
+
+_NO_EXPIRY = float("inf")
+
+
+class FastMemCache(BaseCache):
+    """
+    In-process кэш для горячих TTL-запросов.
+
+    Значения хранятся как (expiry_monotonic, value); просроченная запись удаляется
+    при чтении. В отличие от SimpleMemoryCache не заводит TimerHandle на каждый ключ
+    и по умолчанию не оборачивает операции в asyncio.wait_for (timeout=0).
+    """
+
+    NAME = "fastmemory"
+
+    def __init__(self, serializer=None, **kwargs):
+        kwargs.setdefault("timeout", 0)
+        super().__init__(serializer=serializer or NullSerializer(), **kwargs)
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+
+    def _lookup(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expiry, value = entry
+        if expiry <= time.monotonic():
+            del self._cache[key]
+            return None
+        return value
+
+    async def _get(self, key, encoding="utf-8", _conn=None):
+        return self._lookup(key)
+
+    async def _gets(self, key, encoding="utf-8", _conn=None):
+        return self._lookup(key)
+
+    async def _multi_get(self, keys, encoding="utf-8", _conn=None):
+        return [self._lookup(key) for key in keys]
+
+    async def _set(self, key, value, ttl=None, _cas_token=None, _conn=None):
+        if _cas_token is not None and _cas_token != self._lookup(key):
+            return 0
+        self._cache[key] = (time.monotonic() + ttl if ttl else _NO_EXPIRY, value)
+        return True
+
+    async def _multi_set(self, pairs, ttl=None, _conn=None):
+        for key, value in pairs:
+            await self._set(key, value, ttl=ttl)
+        return True
+
+    async def _add(self, key, value, ttl=None, _conn=None):
+        if self._lookup(key) is not None:
+            raise ValueError("Key {} already exists, use .set to update the value".format(key))
+        return await self._set(key, value, ttl=ttl)
+
+    async def _exists(self, key, _conn=None):
+        return self._lookup(key) is not None
+
+    async def _expire(self, key, ttl, _conn=None):
+        value = self._lookup(key)
+        if value is None:
+            return False
+        self._cache[key] = (time.monotonic() + ttl if ttl else _NO_EXPIRY, value)
+        return True
+
+    async def _delete(self, key, _conn=None):
+        return 1 if self._cache.pop(key, None) is not None else 0
+
+    async def _clear(self, namespace=None, _conn=None):
+        if namespace:
+            for key in [k for k in self._cache if k.startswith(namespace)]:
+                del self._cache[key]
+        else:
+            self._cache.clear()
+        return True
+
+    async def _raw(self, command, *args, encoding="utf-8", _conn=None, **kwargs):
+        return getattr(self._cache, command)(*args, **kwargs)
+
+    async def _redlock_release(self, key, value):
+        if self._lookup(key) == value:
+            return await self._delete(key)
+        return 0
+
+
+def _fast_key(func, *args, **kwargs) -> str:
+    """
+    Ключ кэша: blake2b-хеш от pickle аргументов вместо str()/repr() по умолчанию.
+    Для непиклящихся аргументов (ORM-объекты, клиенты) — запасной вариант через repr.
+    Параметр session (общая сессия хендлера) на результат не влияет и в ключ не входит.
+    """
+    kwargs.pop("session", None)
+    try:
+        payload = pickle.dumps((args, tuple(sorted(kwargs.items()))), protocol=5)
+    except Exception:
+        payload = repr((args, sorted(kwargs.items()))).encode()
+    return func.__module__ + "." + func.__qualname__ + ":" + hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+class cached_with_ttl(cached):
+    """
+    aiocache.cached с FastMemCache и ключами _fast_key по умолчанию.
+
+    При промахе первый вызов выполняет функцию, а параллельные вызовы с тем же ключом
+    ждут его результат, а не повторяют запрос. У обёрнутой функции есть
+    invalidate(*args, **kwargs): удаляет значение из кэша, а если в этот момент
+    идёт заполнение — не даёт записать в кэш уже устаревший результат, и
+    read_since(timestamp, *args, **kwargs): читали ли значение после timestamp
+    (по time.monotonic; вызовы с cache_read=False чтением не считаются).
+    """
+
+    def __init__(self, ttl=SENTINEL, cache=FastMemCache, key_builder=_fast_key, **kwargs):
+        super().__init__(ttl=ttl, cache=cache, key_builder=key_builder, **kwargs)
+        # Завершённые future удаляются сборщиком мусора сами
+        self._inflight: "weakref.WeakValueDictionary[str, asyncio.Future]" = weakref.WeakValueDictionary()
+        self._versions: Dict[str, int] = {}
+        self._read_at: Dict[str, float] = {}
+
+    def __call__(self, f):
+        wrapper = super().__call__(f)
+
+        async def invalidate(*args, **kwargs):
+            await self.invalidate(f, *args, **kwargs)
+
+        def read_since(timestamp: float, *args, **kwargs) -> bool:
+            return self._read_at.get(self.get_cache_key(f, args, kwargs), 0.0) >= timestamp
+
+        wrapper.invalidate = invalidate
+        wrapper.read_since = read_since
+        return wrapper
+
+    async def invalidate(self, f, *args, **kwargs) -> None:
+        """Сбрасывает значение для заданных аргументов."""
+        key = self.get_cache_key(f, args, kwargs)
+        self._versions[key] = self._versions.get(key, 0) + 1
+        self._inflight.pop(key, None)
+        await self.cache.delete(key)
+
+    async def decorator(
+        self, f, *args, cache_read=True, cache_write=True, aiocache_wait_for_write=True, **kwargs
+    ):
+        key = self.get_cache_key(f, args, kwargs)
+
+        if cache_read:
+            self._read_at[key] = time.monotonic()
+            value = await self.get_from_cache(key)
+            if value is not None:
+                return value
+
+            future = self._inflight.get(key)
+            if future is not None:
+                try:
+                    return await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    if not future.cancelled():
+                        raise
+                    # Вызов-заполнитель отменён — выполняем запрос сами
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        version = self._versions.get(key, 0)
+        try:
+            result = await f(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # ожидающих может не быть: помечаем исключение как полученное
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        future.set_result(result)
+
+        # Пока шёл запрос, значение могли инвалидировать — тогда результат уже устарел
+        if cache_write and not self.skip_cache_func(result) and self._versions.get(key, 0) == version:
+            if aiocache_wait_for_write:
+                await self.set_in_cache(key, result)
+            else:
+                asyncio.create_task(self.set_in_cache(key, result))
+
+        return result
+
+
+class Prewarmer:
+    """
+    Фоновый прогрев кэшированных корутин.
+
+    Для каждой зарегистрированной функции запускается задача, которая вызывает её
+    сразу после старта и затем каждые ttl - 1 секунд, чтобы пользовательский запрос
+    не попадал на холодный кэш. Для функций с aiocache-декоратором чтение из кэша
+    пропускается (cache_read=False), поэтому значение действительно обновляется.
+    Повторно обновляются только значения, которые читали с прошлого прогрева
+    (read_since у cached_with_ttl): невостребованные данные не перезапрашиваются.
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[Callable[..., Awaitable[Any]], Tuple[tuple, ...], float]] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, func: Callable[..., Awaitable[Any]], args_iter: Iterable[tuple] = ((),), ttl: float = 60) -> None:
+        """Регистрирует функцию и наборы аргументов, с которыми её прогревать."""
+        self._entries.append((func, tuple(args_iter), ttl))
+
+    def start(self) -> None:
+        """Запускает фоновые задачи прогрева (вызывается после инициализации БД)."""
+        for func, args_list, ttl in self._entries:
+            self._tasks.append(asyncio.create_task(self._loop(func, args_list, ttl)))
+
+    async def stop(self) -> None:
+        """Останавливает задачи прогрева."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _loop(self, func, args_list, ttl) -> None:
+        read_since = getattr(func, "read_since", None)
+        pending = args_list
+        while True:
+            warmed_at = time.monotonic()
+            await asyncio.gather(*(self._warm(func, args) for args in pending))
+            await asyncio.sleep(max(ttl - 1, 1))
+            pending = [args for args in args_list if read_since is None or read_since(warmed_at, *args)]
+
+    @staticmethod
+    async def _warm(func, args) -> None:
+        try:
+            if hasattr(func, "cache"):
+                await func(*args, cache_read=False)
+            else:
+                await func(*args)
+        except Exception as e:
+            logging.warning(f"Не удалось прогреть кэш {func.__name__}{args}: {e}")
+
+
+prewarm = Prewarmer()
+register_prewarm = prewarm.register
+
+__all__ = ["FastMemCache", "cached_with_ttl", "Prewarmer", "prewarm", "register_prewarm"]
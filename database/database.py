@@ -1,46 +1,237 @@
 import logging
+import re
+from contextlib import asynccontextmanager, nullcontext
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List, Dict, Tuple
+from typing import AsyncContextManager, AsyncIterator, Optional, List, Dict, Tuple
 
-from sqlalchemy import select, delete, update, func, or_
+from aiogram.enums import ChatMemberStatus, ChatType
+from sqlalchemy import Row, select, delete, update, func, or_, and_, tuple_, bindparam, literal, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.sql.expression import Update
+from sqlalchemy.engine import make_url
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer, raiseload
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from config import config
+from database.cache import cached_with_ttl, register_prewarm
 from database.models import Base, Admin, Channel, Giveaway, Participant, Winner, GiveawayStatus, ChannelSubscriber, Mailing
 
 
+_DATABASE_URL = make_url(config.DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"))
+
+# Файловая SQLite: одна запись за раз, поэтому писателю хватает одного соединения —
+# конкурирующие хендлеры ждут его в пуле, а не ловят "database is locked".
+# По умолчанию aiosqlite использует NullPool, поэтому пул задаётся явно
+_IS_SQLITE_FILE = (
+    _DATABASE_URL.get_backend_name() == "sqlite"
+    and _DATABASE_URL.database not in (None, "", ":memory:")
+)
+_SQLITE_TIMEOUT = 30
+
+# Серверные СУБД (PostgreSQL/MySQL): размер пула из настроек, LIFO держит «тёплыми»
+# недавно использованные соединения, pre_ping/recycle отбрасывают оборванные
+_SERVER_POOL_OPTIONS = dict(
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    pool_use_lifo=True,
+)
+
+# Кэш подготовленных выражений на соединение: одинаковые SELECT/UPDATE в циклах
+# по batch не разбираются заново. sqlite3 по умолчанию держит 128 выражений
+_SQLITE_CONNECT_ARGS = {"timeout": _SQLITE_TIMEOUT, "cached_statements": 512}
+_ASYNCPG_CONNECT_ARGS = {"statement_cache_size": 1000, "prepared_statement_cache_size": 500}
+
+
+def _engine_options() -> dict:
+    """Параметры пула основного движка в зависимости от СУБД."""
+    if _IS_SQLITE_FILE:
+        return dict(poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0,
+                    connect_args=_SQLITE_CONNECT_ARGS)
+    if _DATABASE_URL.get_backend_name() != "sqlite":
+        if _DATABASE_URL.get_driver_name() == "asyncpg":
+            return dict(_SERVER_POOL_OPTIONS, connect_args=_ASYNCPG_CONNECT_ARGS)
+        return _SERVER_POOL_OPTIONS
+    return {}
+
+
 # Создаем асинхронный движок БД
 engine = create_async_engine(
-    config.DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"),
-    echo=False  # Установите True для отладки SQL запросов
+    _DATABASE_URL,
+    echo=False,  # Установите True для отладки SQL запросов
+    **_engine_options(),
+)
+
+# Отдельный движок только для чтения: в режиме WAL читатели не ждут писателя
+read_engine = (
+    create_async_engine(
+        _DATABASE_URL.set(
+            database=f"file:{_DATABASE_URL.database}",
+            query={**_DATABASE_URL.query, "mode": "ro", "uri": "true"},
+        ),
+        echo=False,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=10,
+        max_overflow=0,
+        pool_use_lifo=True,
+        connect_args=_SQLITE_CONNECT_ARGS,
+    )
+    if _IS_SQLITE_FILE else engine
 )
 
-# Создаем фабрику сессий
+# PRAGMA для SQLite: WAL не блокирует читателей во время записи, synchronous=NORMAL
+# убирает fsync на каждый commit, mmap/cache_size — чтение страниц из памяти
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+# Соединениям только для чтения режим журнала не меняем: его задаёт писатель
+_SQLITE_READ_PRAGMAS = _SQLITE_PRAGMAS[2:]
+
+
+def _register_sqlite_pragmas(target, pragmas) -> None:
+    """Настройка каждого нового соединения SQLite."""
+    @event.listens_for(target.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, _connection_record):
+        cursor = dbapi_conn.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    _register_sqlite_pragmas(engine, _SQLITE_PRAGMAS)
+    if read_engine is not engine:
+        _register_sqlite_pragmas(read_engine, _SQLITE_READ_PRAGMAS)
+
+# Создаем фабрики сессий: async_session — запись, async_read_session — чтение
 async_session = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
+async_read_session = (
+    async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+    if read_engine is not engine else async_session
+)
+
+
+# Запросы горячих путей строятся один раз при импорте модуля: в функциях
+# меняются только значения bindparam, а не сама конструкция select()
+_IS_ADMIN_STMT = select(literal(1)).where(Admin.user_id == bindparam("user_id")).limit(1)
+# Связи розыгрыша загружаются явно (selectinload); raiseload("*") для остальных превращает
+# случайную ленивую загрузку (N+1, а в async — MissingGreenlet) в понятную ошибку
+_GIVEAWAY_LOAD_OPTIONS = (selectinload(Giveaway.channel), selectinload(Giveaway.participants), raiseload("*"))
+_GIVEAWAY_LIST_OPTIONS = (selectinload(Giveaway.channel), raiseload("*"))
+_GIVEAWAY_REPORT_OPTIONS = (
+    selectinload(Giveaway.channel),
+    selectinload(Giveaway.creator),
+    selectinload(Giveaway.winners),
+    raiseload("*"),
+)
+_GET_GIVEAWAY_STMT = (
+    select(Giveaway)
+    .options(*_GIVEAWAY_LOAD_OPTIONS)
+    .where(Giveaway.id == bindparam("giveaway_id"))
+)
+# Для карточки розыгрыша: канал и число участников без загрузки самих участников
+_GET_GIVEAWAY_SUMMARY_STMT = (
+    select(Giveaway)
+    .options(*_GIVEAWAY_LIST_OPTIONS, undefer(Giveaway.participants_count))
+    .where(Giveaway.id == bindparam("giveaway_id"))
+)
+_PARTICIPANTS_COUNT_STMT = (
+    select(func.count())
+    .select_from(Participant)
+    .where(Participant.giveaway_id == bindparam("giveaway_id"))
+)
+_GET_CHANNEL_STMT = (
+    select(Channel)
+    .options(selectinload(Channel.admin))
+    .where(Channel.channel_id == bindparam("channel_id"))
+)
+_CHANNEL_EXISTS_STMT = select(literal(1)).where(Channel.channel_id == bindparam("channel_id")).limit(1)
+_CHANNELS_COUNT_STMT = select(func.count()).select_from(Channel)
+
+# Префикс ссылки/упоминания канала: https://t.me/, http://t.me/ или @
+_CHANNEL_PREFIX_RE = re.compile(r"^(?:https?://t\.me/|@)")
+
+# Статусы, при которых бот может управлять каналом
+_BOT_ADMIN_STATUSES = frozenset({ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR})
+_CHANNEL_FOR_DISCUSSION_STMT = select(Channel).where(
+    Channel.discussion_group_id == bindparam("discussion_group_id")
+)
+# Core UPDATE по таблице (не по ORM-сущности): executemany по первичному ключу
+# без identity map и unit-of-work
+_UPDATE_SUBSCRIBER_PROFILE_STMT = (
+    update(ChannelSubscriber.__table__)
+    .where(ChannelSubscriber.__table__.c.id == bindparam("b_id"))
+    .values(
+        username=bindparam("b_username"),
+        first_name=bindparam("b_first_name"),
+        full_name=bindparam("b_full_name"),
+    )
+)
 
 
 async def init_db():
     """Инициализация базы данных - создание таблиц"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
         logging.info("База данных инициализирована")
 
     # Добавляем главного админа, если его нет
     await add_main_admin()
 
 
-async def get_session() -> AsyncSession:
-    """Получение сессии для работы с БД"""
-    async with async_session() as session:
-        return session
+def _create_missing_indexes(sync_conn):
+    """
+    Индексы для таблиц, созданных до их появления в моделях
+    (create_all не добавляет индексы к уже существующим таблицам).
+    На уникальные индексы участников и мест победителей опираются INSERT ... ON CONFLICT DO NOTHING
+    в add_participant, add_winner и finish_giveaway. Если в старой БД уже есть дубликаты,
+    уникальный индекс не создаётся — это видно по предупреждению в логе.
+    """
+    tables = (Admin, Participant, Winner, Giveaway, ChannelSubscriber)
+    for index in (index for model in tables for index in model.__table__.indexes):
+        try:
+            index.create(sync_conn, checkfirst=True)
+        except Exception as e:
+            logging.warning(f"Не удалось создать индекс {index.name}: {e}")
+
+
+@asynccontextmanager
+async def get_session(readonly: bool = False) -> AsyncIterator[AsyncSession]:
+    """
+    Одна сессия на хендлер: передаётся в функции БД через параметр session,
+    чтобы несколько запросов подряд не открывали каждый свою сессию.
+    readonly=True — сессия из пула чтения (только для хендлеров без записи).
+
+        async with get_session(readonly=True) as session:
+            channel = await get_channel(channel_id, session=session)
+            stats = await get_channel_subscribers_stats(channel_id, session=session)
+    """
+    async with (async_read_session if readonly else async_session)() as session:
+        yield session
+
+
+@asynccontextmanager
+async def _session_scope(session: Optional[AsyncSession] = None, readonly: bool = False) -> AsyncIterator[AsyncSession]:
+    """Переданная вызывающим сессия или новая, если её нет (для чтения — из пула чтения)."""
+    if session is not None:
+        yield session
+        return
+    async with (async_read_session if readonly else async_session)() as new_session:
+        yield new_session
 
 
 async def add_main_admin():
-    """Добавляем главного администратора в БД"""
+    """Добавляем главного администратора и администраторов из ADMIN_IDS в БД"""
     async with async_session() as session:
         # Проверяем, есть ли уже главный админ
         result = await session.execute(
@@ -59,129 +250,227 @@ async def add_main_admin():
             )
             session.add(main_admin)
             await session.commit()
+            await get_all_admins_core.invalidate()
             logging.info(f"Главный администратор добавлен: {config.MAIN_ADMIN_ID}")
 
+        # Дополнительные администраторы из ADMIN_IDS: недостающие записи создаются один раз
+        # (на admins.user_id ссылаются каналы, розыгрыши и рассылки)
+        extra_ids = config.ADMIN_IDS - {config.MAIN_ADMIN_ID}
+        if extra_ids:
+            result = await session.execute(
+                sqlite_insert(Admin)
+                .values([{"user_id": user_id, "is_main_admin": False} for user_id in extra_ids])
+                .on_conflict_do_nothing(index_elements=["user_id"])
+            )
+            await session.commit()
+            if result.rowcount:
+                await get_all_admins_core.invalidate()
+                logging.info(f"Администраторы из ADMIN_IDS добавлены: {sorted(extra_ids)}")
+
+
+# Размер порции при потоковом чтении больших выборок
+_STREAM_BATCH = 500
+
+# Размер batch для массовых INSERT/UPDATE подписчиков. В SQLite multi-row INSERT
+# ограничен 32766 параметрами на запрос (≈6 на строку) — больше не берём
+_SQLITE_MAX_VARIABLES = 32766
+_BULK_BATCH = (
+    min(config.DB_BATCH_SIZE, _SQLITE_MAX_VARIABLES // 6)
+    if engine.dialect.name == "sqlite" else config.DB_BATCH_SIZE
+)
+
+
+async def _stream_scalars(stmt, session: Optional[AsyncSession] = None) -> AsyncIterator:
+    """
+    Потоковое чтение ORM-объектов (yield_per) вместо загрузки всей выборки через .all().
+    В собственной сессии объекты порции после её выдачи отсоединяются (expunge),
+    так что в памяти одновременно не больше _STREAM_BATCH объектов; объекты из сессии
+    вызывающего не трогаем — он может их изменять и сохранять.
+    """
+    own_session = session is None
+    async with _session_scope(session, readonly=True) as session:
+        result = await session.stream_scalars(stmt.execution_options(yield_per=_STREAM_BATCH))
+        async for partition in result.partitions():
+            for item in partition:
+                yield item
+            if own_session:
+                for item in partition:
+                    session.expunge(item)
+
 
 # Функции для работы с администраторами
-async def is_admin(user_id: int) -> bool:
+async def is_admin(user_id: int, session: Optional[AsyncSession] = None) -> bool:
     """Проверка, является ли пользователь администратором"""
-    async with async_session() as session:
-        result = await session.execute(
-            select(Admin).where(Admin.user_id == user_id)
+    # Администраторы из конфигурации (MAIN_ADMIN_ID, ADMIN_IDS) — без запроса к БД
+    if user_id in config.ADMIN_IDS:
+        return True
+    async with _session_scope(session, readonly=True) as session:
+        # SELECT 1 ... LIMIT 1: без загрузки строки и создания ORM-объекта
+        result = await session.execute(_IS_ADMIN_STMT, {"user_id": user_id})
+        return result.scalar() is not None
+
+
+async def get_admin_by_username(username: str, session: Optional[AsyncSession] = None) -> Optional[Admin]:
+    """
+    Администратор по username (без @), без учёта регистра — как в Telegram.
+    username в БД может быть устаревшим (его обновляет только update_admin_profile),
+    поэтому результат — лишь подсказка: пользователя сверяют по user_id из get_chat.
+    """
+    async with _session_scope(session, readonly=True) as session:
+        return await session.scalar(
+            select(Admin).where(func.lower(Admin.username) == username.lower()).limit(1)
         )
-        return result.scalar_one_or_none() is not None
 
 
-async def add_admin(user_id: int, username: str = None, first_name: str = None, full_name: str = None) -> bool:
-    """Добавление нового администратора"""
-    async with async_session() as session:
+async def add_admin(user_id: int, username: str = None, first_name: str = None, full_name: str = None, session: Optional[AsyncSession] = None) -> bool:
+    """
+    Добавление нового администратора одним INSERT ... ON CONFLICT DO NOTHING RETURNING:
+    False, если администратор с таким user_id уже есть (отдельная проверка is_admin не нужна).
+    """
+    async with _session_scope(session) as session:
         try:
-            admin = Admin(
-                user_id=user_id,
-                username=username,
-                first_name=first_name,
-                full_name=full_name,
-                is_main_admin=False
+            result = await session.execute(
+                sqlite_insert(Admin).values(
+                    user_id=user_id,
+                    username=username,
+                    first_name=first_name,
+                    full_name=full_name,
+                    is_main_admin=False
+                ).on_conflict_do_nothing(index_elements=["user_id"]).returning(Admin.id)
             )
-            session.add(admin)
+            added = result.scalar() is not None
             await session.commit()
+            if not added:
+                return False
+            await get_all_admins_core.invalidate()
             return True
         except IntegrityError:
             await session.rollback()
             return False
 
 
-async def remove_admin(user_id: int) -> bool:
+async def remove_admin(user_id: int, session: Optional[AsyncSession] = None) -> bool:
     """Удаление администратора (кроме главного)"""
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         result = await session.execute(
-            select(Admin).where(
+            delete(Admin).where(
                 Admin.user_id == user_id,
                 Admin.is_main_admin == False  # Главного админа удалить нельзя
-            )
+            ).returning(Admin.id)
         )
-        admin = result.scalar_one_or_none()
-
-        if admin:
-            await session.delete(admin)
-            await session.commit()
-            return True
-        return False
+        removed = result.first() is not None
+        await session.commit()
+        if removed:
+            await get_all_admins_core.invalidate()
+        return removed
 
 
-async def get_all_admins() -> List[Admin]:
+async def get_all_admins(session: Optional[AsyncSession] = None) -> List[Admin]:
     """Получение списка всех администраторов"""
-    async with async_session() as session:
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(select(Admin))
         return result.scalars().all()
 
 
-async def update_admin_profile(user) -> None:
+@cached_with_ttl(ttl=30)
+async def get_all_admins_core(session: Optional[AsyncSession] = None) -> List[Row]:
+    """
+    Список администраторов кортежами Row (без ORM-объектов) — для вывода в списках.
+    Поля доступны как атрибуты: row.user_id, row.username, row.first_name, ...
+    Кэшируется на 30 секунд; add_admin/remove_admin/update_admin_profile сбрасывают кэш.
+    """
+    async with _session_scope(session, readonly=True) as session:
+        result = await session.execute(
+            select(Admin.user_id, Admin.username, Admin.first_name, Admin.is_main_admin)
+        )
+        return result.all()
+
+
+async def update_admin_profile(user, session: Optional[AsyncSession] = None) -> None:
     """Обновляет username/first_name/full_name администратора по данным Telegram пользователя."""
-    async with async_session() as session:
-        result = await session.execute(select(Admin).where(Admin.user_id == user.id))
-        admin = result.scalar_one_or_none()
-        if not admin:
-            return
-        changed = False
-        if admin.username != user.username:
-            admin.username = user.username
-            changed = True
-        if admin.first_name != user.first_name:
-            admin.first_name = user.first_name
-            changed = True
-        # Формируем полное имя из first_name и last_name, если есть
-        full_name = user.full_name or (user.first_name + (" " + user.last_name if user.last_name else ""))
-        if admin.full_name != full_name:
-            admin.full_name = full_name
-            changed = True
-        if changed:
+    # Формируем полное имя из first_name и last_name, если есть
+    full_name = user.full_name or (user.first_name + (" " + user.last_name if user.last_name else ""))
+    async with _session_scope(session) as session:
+        # Сравнение с текущими значениями — в самом UPDATE: один запрос, без изменений строка не трогается
+        # (is_distinct_from в SQLite — «IS NOT», корректно сравнивает NULL)
+        result = await session.execute(
+            update(Admin)
+            .where(
+                Admin.user_id == user.id,
+                or_(
+                    Admin.username.is_distinct_from(user.username),
+                    Admin.first_name.is_distinct_from(user.first_name),
+                    Admin.full_name.is_distinct_from(full_name)
+                )
+            )
+            .values(username=user.username, first_name=user.first_name, full_name=full_name)
+        )
+        if result.rowcount:
             await session.commit()
+            await get_all_admins_core.invalidate()
 
 
 # Функции для работы с каналами
 async def add_channel(channel_id: int, channel_name: str,
                       channel_username: str = None, added_by: int = None,
-                      discussion_group_id: int = None) -> bool:
-    """Добавление канала"""
-    async with async_session() as session:
+                      discussion_group_id: int = None, session: Optional[AsyncSession] = None) -> bool:
+    """
+    Добавление канала одним INSERT ... ON CONFLICT DO NOTHING RETURNING:
+    False, если канал с таким channel_id уже есть.
+    """
+    async with _session_scope(session) as session:
         try:
-            channel = Channel( 
-                channel_id=channel_id,
-                channel_name=channel_name,
-                channel_username=channel_username,
-                added_by=added_by,
-                discussion_group_id=discussion_group_id,
+            result = await session.execute(
+                sqlite_insert(Channel).values(
+                    channel_id=channel_id,
+                    channel_name=channel_name,
+                    channel_username=channel_username,
+                    added_by=added_by,
+                    discussion_group_id=discussion_group_id,
+                ).on_conflict_do_nothing(index_elements=["channel_id"]).returning(Channel.id)
             )
-            session.add(channel)
+            added = result.scalar() is not None
             await session.commit()
+            if not added:
+                return False
+            await _invalidate_channel_lists()
             return True
         except IntegrityError:
             await session.rollback()
             return False
 
 
-async def add_channel_by_username(channel_username: str, bot, added_by: int = None) -> tuple[bool, str]:
-    """Добавление канала по username/ссылке + автоматическое получение discussion group"""
+async def add_channel_by_username(channel_username: str, bot, added_by: int = None,
+                                  api_limiter: Optional[AsyncContextManager] = None) -> tuple[bool, str, Optional[dict]]:
+    """
+    Добавление канала по username/ссылке + автоматическое получение discussion group.
+    Третий элемент — {"id", "title"} найденного канала при успехе (чтобы вызывающему
+    не запрашивать get_chat повторно), иначе None.
+    api_limiter (например, asyncio.Semaphore) охватывает только запросы к Bot API,
+    а не запись в БД.
+    """
+    limiter = api_limiter or nullcontext()
     try:
-        clean_username = channel_username.replace('@', '').replace('https://t.me/', '').replace('http://t.me/', '')
+        clean_username = _CHANNEL_PREFIX_RE.sub("", channel_username)
 
         # Получаем информацию о канале
         try:
-            chat = await bot.get_chat(f"@{clean_username}")
+            async with limiter:
+                chat = await bot.get_chat(f"@{clean_username}")
         except Exception as e:
-            return False, f"❌ Канал не найден: {str(e)}"
+            return False, f"❌ Канал не найден: {str(e)}", None
 
-        if chat.type != "channel":
-            return False, "❌ Это не канал!"
+        if chat.type != ChatType.CHANNEL:
+            return False, "❌ Это не канал!", None
 
         # Проверяем права бота
         try:
-            bot_member = await bot.get_chat_member(chat.id, bot.id)
-            if bot_member.status not in ["administrator", "creator"]:
-                return False, "❌ Бот не является администратором этого канала!"
+            async with limiter:
+                bot_member = await bot.get_chat_member(chat.id, bot.id)
+            if bot_member.status not in _BOT_ADMIN_STATUSES:
+                return False, "❌ Бот не является администратором этого канала!", None
         except Exception:
-            return False, "❌ Нет доступа к каналу! Добавьте бота как администратора."
+            return False, "❌ Нет доступа к каналу! Добавьте бота как администратора.", None
 
         # ←←← ОПРЕДЕЛЯЕМ ГРУППУ ОБСУЖДЕНИЯ ←←←
         discussion_group_id = chat.linked_chat_id  # Может быть None
@@ -201,44 +490,80 @@ async def add_channel_by_username(channel_username: str, bot, added_by: int = No
                 status += f"\n🔗 Привязана группа обсуждений: {discussion_group_id}"
             else:
                 status += "\nℹ️ У канала нет группы обсуждений."
-            return True, status
+            return True, status, {"id": chat.id, "title": chat.title}
         else:
-            return False, "⚠️ Канал уже добавлен (обновлены данные)."
+            return False, "⚠️ Канал уже добавлен (обновлены данные).", None
 
     except Exception as e:
-        return False, f"❌ Ошибка при добавлении канала: {str(e)}"
+        return False, f"❌ Ошибка при добавлении канала: {str(e)}", None
 
 
-async def get_all_channels() -> List[Channel]:
-    """Получение списка всех каналов"""
-    async with async_session() as session:
+async def get_all_channels(session: Optional[AsyncSession] = None) -> List[Channel]:
+    """
+    Получение списка всех каналов (без загрузки добавившего админа).
+    channel.admin закрыт raiseload: обращение к нему по строкам — ошибка, а не N+1;
+    канал вместе с админом — get_channel.
+    """
+    async with _session_scope(session, readonly=True) as session:
+        result = await session.execute(select(Channel).options(raiseload(Channel.admin)))
+        return result.scalars().all()
+
+
+@cached_with_ttl(ttl=30)
+async def get_all_channels_core(session: Optional[AsyncSession] = None) -> List[Row]:
+    """
+    Список каналов кортежами Row (без ORM-объектов и загрузки админа) — для Select в диалогах.
+    Поля доступны как атрибуты: row.channel_id, row.channel_name, ...
+    Кэшируется на 30 секунд; add_channel/remove_channel сбрасывают кэш.
+    """
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(
-            select(Channel).options(selectinload(Channel.admin))
+            select(Channel.channel_id, Channel.channel_name, Channel.channel_username, Channel.discussion_group_id)
         )
-        return result.scalars().all()
+        return result.all()
 
 
-async def remove_channel(channel_id: int) -> bool:
+async def channel_exists(channel_id: int, session: Optional[AsyncSession] = None) -> bool:
+    """Есть ли канал в БД (SELECT 1 ... LIMIT 1, без загрузки строки)."""
+    async with _session_scope(session, readonly=True) as session:
+        return await session.scalar(_CHANNEL_EXISTS_STMT, {"channel_id": channel_id}) is not None
+
+
+async def channels_count(session: Optional[AsyncSession] = None) -> int:
+    """Количество каналов (SELECT COUNT(*)) — проверка на пустоту без загрузки списка."""
+    async with _session_scope(session, readonly=True) as session:
+        return await session.scalar(_CHANNELS_COUNT_STMT)
+
+
+# Список каналов нужен диалогам каналов и мастерам розыгрыша/рассылки: прогреваем его
+# при старте и обновляем в фоне, пока его читают, чтобы отрисовка не ждала запроса к БД
+register_prewarm(get_all_channels_core, ttl=30)
+
+
+async def _invalidate_channel_lists() -> None:
+    """Сброс кэшированных списков каналов после изменения каналов."""
+    await get_all_channels_core.invalidate()
+
+
+async def remove_channel(channel_id: int, session: Optional[AsyncSession] = None) -> bool:
     """Удаление канала"""
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         result = await session.execute(
-            select(Channel).where(Channel.channel_id == channel_id)
+            delete(Channel).where(Channel.channel_id == channel_id).returning(Channel.id)
         )
-        channel = result.scalar_one_or_none()
-
-        if channel:
-            await session.delete(channel)
-            await session.commit()
-            return True
-        return False
+        removed = result.first() is not None
+        await session.commit()
+        if removed:
+            await _invalidate_channel_lists()
+        return removed
 
 
 # Функции для работы с розыгрышами
 async def create_giveaway(title: str, description: str, message_winner: str, end_time,
                           channel_id: int, created_by: int, winner_places: int = 1,
-                          media_type: str = None, media_file_id: str = None) -> Optional[Giveaway]:
+                          media_type: str = None, media_file_id: str = None, session: Optional[AsyncSession] = None) -> Optional[Giveaway]:
     """Создание нового розыгрыша"""
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         giveaway = Giveaway(
             title=title,
             description=description,
@@ -253,62 +578,100 @@ async def create_giveaway(title: str, description: str, message_winner: str, end
         session.add(giveaway)
         await session.commit()
         await session.refresh(giveaway)
+        await get_active_giveaways.invalidate()
         return giveaway
 
 
 
-async def get_giveaway(giveaway_id: int) -> Optional[Giveaway]:
+async def get_giveaway(giveaway_id: int, session: Optional[AsyncSession] = None) -> Optional[Giveaway]:
     """Получение розыгрыша по ID"""
-    async with async_session() as session:
-        result = await session.execute(
-            select(Giveaway)
-            .options(selectinload(Giveaway.channel), selectinload(Giveaway.participants))
-            .where(Giveaway.id == giveaway_id)
-        )
-        return result.scalar_one_or_none()
+    async with _session_scope(session, readonly=True) as session:
+        # Поиск по первичному ключу: в общей сессии объект берётся из identity map без запроса
+        return await session.get(Giveaway, giveaway_id, options=_GIVEAWAY_LOAD_OPTIONS)
 
 
+async def get_giveaway_for_report(giveaway_id: int, session: Optional[AsyncSession] = None) -> Optional[Giveaway]:
+    """Розыгрыш с каналом, создателем и победителями — для отчётов (utils/statistics.py)."""
+    async with _session_scope(session, readonly=True) as session:
+        return await session.get(Giveaway, giveaway_id, options=_GIVEAWAY_REPORT_OPTIONS)
 
-async def get_active_giveaways() -> List[Giveaway]:
-    """Получение активных розыгрышей"""
-    async with async_session() as session:
+
+async def get_giveaway_summary(giveaway_id: int, session: Optional[AsyncSession] = None) -> Optional[Giveaway]:
+    """
+    Розыгрыш с каналом и числом участников (giveaway.participants_count) —
+    для карточек, которым не нужен сам список участников.
+    """
+    async with _session_scope(session, readonly=True) as session:
+        return await session.scalar(_GET_GIVEAWAY_SUMMARY_STMT, {"giveaway_id": giveaway_id})
+
+
+
+@cached_with_ttl(ttl=60)
+async def get_active_giveaways(session: Optional[AsyncSession] = None) -> List[Giveaway]:
+    """
+    Получение активных розыгрышей (с каналом, без загрузки участников).
+    Кэшируется на 60 секунд; функции, меняющие розыгрыши,
+    сбрасывают кэш через get_active_giveaways.invalidate().
+    """
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(
             select(Giveaway)
-            .options(
-                selectinload(Giveaway.channel),
-                selectinload(Giveaway.participants)
-            )
+            .options(*_GIVEAWAY_LIST_OPTIONS)
             .where(Giveaway.status == GiveawayStatus.ACTIVE.value)
         )
         return result.scalars().all()
 
 
-async def get_finished_giveaways() -> List[Giveaway]:
-    """Получение завершенных розыгрышей"""
-    async with async_session() as session:
+async def get_active_giveaways_with_counts(session: Optional[AsyncSession] = None) -> List[Tuple[Giveaway, int]]:
+    """
+    Активные розыгрыши вместе с количеством участников.
+    Один запрос с GROUP BY вместо загрузки всех Participant, когда нужно только их число.
+    """
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(
-            select(Giveaway)
-            .options(
-                selectinload(Giveaway.channel),
-                selectinload(Giveaway.participants)
-            )
-            .where(Giveaway.status == GiveawayStatus.FINISHED.value)
+            select(Giveaway, func.count(Participant.id).label("participants_count"))
+            .outerjoin(Participant, Participant.giveaway_id == Giveaway.id)
+            .options(*_GIVEAWAY_LIST_OPTIONS)
+            .where(Giveaway.status == GiveawayStatus.ACTIVE.value)
+            .group_by(Giveaway.id)
         )
+        return [(giveaway, count) for giveaway, count in result.all()]
+
+
+def _finished_giveaways_stmt():
+    return (
+        select(Giveaway)
+        .options(
+            selectinload(Giveaway.channel),
+            selectinload(Giveaway.participants),
+            selectinload(Giveaway.winners),
+            raiseload("*"),
+        )
+        .where(Giveaway.status == GiveawayStatus.FINISHED.value)
+    )
+
+
+async def get_finished_giveaways(session: Optional[AsyncSession] = None) -> List[Giveaway]:
+    """Получение завершенных розыгрышей"""
+    async with _session_scope(session, readonly=True) as session:
+        result = await session.execute(_finished_giveaways_stmt())
         return result.scalars().all()
 
 
-async def get_finished_giveaways_page(page: int, page_size: int) -> List[Giveaway]:
+def iter_finished_giveaways(session: Optional[AsyncSession] = None) -> AsyncIterator[Giveaway]:
+    """Завершенные розыгрыши потоком, порциями по _STREAM_BATCH строк."""
+    return _stream_scalars(_finished_giveaways_stmt(), session)
+
+
+async def get_finished_giveaways_page(page: int, page_size: int, session: Optional[AsyncSession] = None) -> List[Giveaway]:
     """Получение страницы завершенных розыгрышей (пагинация)."""
     if page < 1:
         page = 1
     offset = (page - 1) * page_size
-    async with async_session() as session:
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(
             select(Giveaway)
-            .options(
-                selectinload(Giveaway.channel),
-                selectinload(Giveaway.participants)
-            )
+            .options(*_GIVEAWAY_LOAD_OPTIONS)
             .where(Giveaway.status == GiveawayStatus.FINISHED.value)
             .order_by(Giveaway.end_time.desc())
             .offset(offset)
@@ -317,73 +680,129 @@ async def get_finished_giveaways_page(page: int, page_size: int) -> List[Giveawa
         return result.scalars().all()
 
 
-async def count_finished_giveaways() -> int:
+async def get_finished_giveaways_keyset(
+    cursor: Optional[Tuple[datetime, int]], page_size: int, session: Optional[AsyncSession] = None
+) -> Tuple[List[Giveaway], Optional[Tuple[datetime, int]]]:
+    """
+    Страница завершенных розыгрышей по курсору (keyset-пагинация).
+    В отличие от OFFSET не перечитывает предыдущие страницы: выборка идёт
+    по индексу (status, end_time) сразу с позиции курсора.
+
+    Args:
+        cursor: (end_time, id) последнего розыгрыша предыдущей страницы или None для первой
+        page_size: Размер страницы
+
+    Returns:
+        (розыгрыши страницы, курсор следующей страницы или None, если страница последняя)
+    """
+    query = (
+        select(Giveaway)
+        .options(*_GIVEAWAY_LIST_OPTIONS)
+        .where(Giveaway.status == GiveawayStatus.FINISHED.value)
+    )
+    if cursor is not None:
+        query = query.where(tuple_(Giveaway.end_time, Giveaway.id) < tuple_(*cursor))
+
+    async with _session_scope(session, readonly=True) as session:
+        result = await session.execute(
+            query.order_by(Giveaway.end_time.desc(), Giveaway.id.desc()).limit(page_size + 1)
+        )
+        giveaways = list(result.scalars().all())
+
+    # Лишняя строка означает, что есть следующая страница
+    if len(giveaways) <= page_size:
+        return giveaways, None
+    giveaways = giveaways[:page_size]
+    last = giveaways[-1]
+    return giveaways, (last.end_time, last.id)
+
+
+async def count_finished_giveaways(session: Optional[AsyncSession] = None) -> int:
     """Количество завершенных розыгрышей."""
-    async with async_session() as session:
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(
-            select(func.count(Giveaway.id)).where(Giveaway.status == GiveawayStatus.FINISHED.value)
+            select(func.count())
+            .select_from(Giveaway)
+            .where(Giveaway.status == GiveawayStatus.FINISHED.value)
         )
         return int(result.scalar() or 0)
 
 
-async def delete_finished_older_than(days: int) -> int:
+async def delete_finished_older_than(days: int, session: Optional[AsyncSession] = None) -> int:
     """Удаляет из базы розыгрыши, завершенные более чем days дней назад. Возвращает кол-во удаленных розыгрышей.
     Удаляются также их участники и победители."""
     threshold = datetime.now(timezone.utc) - timedelta(days=days)
-    async with async_session() as session:
-        # Найдем id таких розыгрышей
+    async with _session_scope(session) as session:
+        # Подзапрос вместо выборки id в Python: SQLite сам находит удаляемые розыгрыши.
+        # Дочерние строки удаляются явно — ON DELETE CASCADE без PRAGMA foreign_keys не срабатывает
+        victims = select(Giveaway.id).where(
+            Giveaway.status == GiveawayStatus.FINISHED.value,
+            Giveaway.end_time < threshold
+        )
+        no_sync = {"synchronize_session": False}
+        await session.execute(
+            delete(Participant).where(Participant.giveaway_id.in_(victims)), execution_options=no_sync
+        )
+        await session.execute(
+            delete(Winner).where(Winner.giveaway_id.in_(victims)), execution_options=no_sync
+        )
         result = await session.execute(
-            select(Giveaway.id).where(
-                Giveaway.status == GiveawayStatus.FINISHED.value,
-                Giveaway.end_time < threshold
-            )
+            delete(Giveaway).where(Giveaway.id.in_(victims)), execution_options=no_sync
         )
-        ids = [gid for (gid,) in result.all()]
-        if not ids:
-            return 0
-        # Удаляем участников и победителей для этих розыгрышей
-        await session.execute(delete(Participant).where(Participant.giveaway_id.in_(ids)))
-        await session.execute(delete(Winner).where(Winner.giveaway_id.in_(ids)))
-        # Удаляем сами розыгрыши
-        await session.execute(delete(Giveaway).where(Giveaway.id.in_(ids)))
         await session.commit()
-        return len(ids)
+        return result.rowcount
 
 
-async def update_giveaway_message_id(giveaway_id: int, message_id: int):
+async def update_giveaway_message_id(giveaway_id: int, message_id: int, session: Optional[AsyncSession] = None):
     """Обновление ID сообщения розыгрыша в канале"""
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         await session.execute(
             update(Giveaway)
             .where(Giveaway.id == giveaway_id)
             .values(message_id=message_id)
         )
         await session.commit()
+        await get_active_giveaways.invalidate()
+
+
+# UPDATE для каждого набора полей строится один раз и дальше переиспользуется
+_GIVEAWAY_UPDATE_STMTS: Dict[frozenset, Update] = {}
 
 
-async def update_giveaway_fields(giveaway_id: int, **fields) -> Optional[Giveaway]:
+def _giveaway_update_stmt(field_names: frozenset) -> Update:
+    """UPDATE giveaways по id для заданного набора полей (значения — через bindparam b_<поле>)."""
+    stmt = _GIVEAWAY_UPDATE_STMTS.get(field_names)
+    if stmt is None:
+        stmt = (
+            update(Giveaway)
+            .where(Giveaway.id == bindparam("b_giveaway_id"))
+            .values({name: bindparam(f"b_{name}") for name in field_names})
+        )
+        # Несуществующие поля не кэшируем: такой запрос всё равно упадёт при компиляции
+        if field_names.issubset(Giveaway.__table__.c.keys()):
+            _GIVEAWAY_UPDATE_STMTS[field_names] = stmt
+    return stmt
+
+
+async def update_giveaway_fields(giveaway_id: int, session: Optional[AsyncSession] = None, **fields) -> Optional[Giveaway]:
     """Обновляет произвольные поля розыгрыша и возвращает обновленный объект."""
     if not fields:
-        return await get_giveaway(giveaway_id)
-    async with async_session() as session:
+        return await get_giveaway(giveaway_id, session=session)
+    async with _session_scope(session) as session:
         await session.execute(
-            update(Giveaway)
-            .where(Giveaway.id == giveaway_id)
-            .values(**fields)
+            _giveaway_update_stmt(frozenset(fields)),
+            {"b_giveaway_id": giveaway_id, **{f"b_{name}": value for name, value in fields.items()}}
         )
         await session.commit()
+        await get_active_giveaways.invalidate()
         # Вернем обновленный объект с нужными связями
-        result = await session.execute(
-            select(Giveaway)
-            .options(selectinload(Giveaway.channel), selectinload(Giveaway.participants))
-            .where(Giveaway.id == giveaway_id)
-        )
+        result = await session.execute(_GET_GIVEAWAY_STMT, {"giveaway_id": giveaway_id})
         return result.scalar_one_or_none()
 
 
-async def finish_giveaway(giveaway_id: int, winners_data: List[dict] = None):
+async def finish_giveaway(giveaway_id: int, winners_data: List[dict] = None, session: Optional[AsyncSession] = None):
     """Завершение розыгрыша с несколькими победителями"""
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         # Обновляем статус розыгрыша
         await session.execute(
             update(Giveaway)
@@ -391,104 +810,95 @@ async def finish_giveaway(giveaway_id: int, winners_data: List[dict] = None):
             .values(status=GiveawayStatus.FINISHED.value)
         )
 
-        # Добавляем победителей
+        # Добавляем победителей одним INSERT; уже записанные места (повторное завершение)
+        # пропускаются по уникальному индексу (giveaway_id, place)
         if winners_data:
-            for winner_data in winners_data:
-                winner = Winner(
-                    giveaway_id=giveaway_id,
-                    user_id=winner_data["user_id"],
-                    username=winner_data.get("username"),
-                    first_name=winner_data.get("first_name"),
-                    place=winner_data["place"],
-                    full_name=winner_data.get("full_name")
-                )
-                session.add(winner)
+            await session.execute(
+                sqlite_insert(Winner).values([
+                    {
+                        "giveaway_id": giveaway_id,
+                        "user_id": winner_data["user_id"],
+                        "username": winner_data.get("username"),
+                        "first_name": winner_data.get("first_name"),
+                        "place": winner_data["place"],
+                        "full_name": winner_data.get("full_name"),
+                    }
+                    for winner_data in winners_data
+                ]).on_conflict_do_nothing()
+            )
 
         await session.commit()
+        await get_active_giveaways.invalidate()
 
 
-async def delete_giveaway(giveaway_id: int) -> bool:
-    """Удаление розыгрыша"""
-    async with async_session() as session:
-        # Сначала удаляем победителей
+async def delete_giveaway(giveaway_id: int, session: Optional[AsyncSession] = None) -> bool:
+    """Удаление розыгрыша вместе с участниками и победителями"""
+    async with _session_scope(session) as session:
+        # ON DELETE CASCADE в схеме не срабатывает в SQLite без PRAGMA foreign_keys
+        # и отсутствует в таблицах, созданных раньше, поэтому дочерние строки удаляем явно
         await session.execute(
             delete(Winner).where(Winner.giveaway_id == giveaway_id)
         )
-        # Затем удаляем участников
         await session.execute(
             delete(Participant).where(Participant.giveaway_id == giveaway_id)
         )
-        # Затем удаляем розыгрыш
         result = await session.execute(
-            select(Giveaway).where(Giveaway.id == giveaway_id)
+            delete(Giveaway).where(Giveaway.id == giveaway_id).returning(Giveaway.id)
         )
-        giveaway = result.scalar_one_or_none()
-
-        if giveaway:
-            await session.delete(giveaway)
-            await session.commit()
-            return True
         await session.commit()
-        return False
+        await get_active_giveaways.invalidate()
+        return result.first() is not None
 
 
 # Функции для работы с участниками
 async def add_participant(giveaway_id: int, user_id: int,
-                          username: str = None, first_name: str = None, full_name: str = None) -> bool:
-    """Добавление участника в розыгрыш"""
-    async with async_session() as session:
+                          username: str = None, first_name: str = None, full_name: str = None, session: Optional[AsyncSession] = None) -> bool:
+    """Добавление участника в розыгрыш (False — если пользователь уже участвует)"""
+    async with _session_scope(session) as session:
         try:
-            # Проверяем, не участвует ли уже пользователь
+            # Один запрос вместо SELECT + INSERT: дубликат отсекает уникальный индекс
             result = await session.execute(
-                select(Participant).where(
-                    Participant.giveaway_id == giveaway_id,
-                    Participant.user_id == user_id
-                )
-            )
-            existing = result.scalar_one_or_none()
-
-            if existing:
-                return False  # Уже участвует
-
-            participant = Participant(
-                giveaway_id=giveaway_id,
-                user_id=user_id,
-                username=username,
-                first_name=first_name,
-                full_name=full_name
+                sqlite_insert(Participant).values(
+                    giveaway_id=giveaway_id,
+                    user_id=user_id,
+                    username=username,
+                    first_name=first_name,
+                    full_name=full_name
+                ).on_conflict_do_nothing()
             )
-            session.add(participant)
             await session.commit()
-            return True
+            return result.rowcount == 1
         except IntegrityError:
             await session.rollback()
             return False
 
 
-
-async def get_participants_count(giveaway_id: int) -> int:
+async def get_participants_count(giveaway_id: int, session: Optional[AsyncSession] = None) -> int:
     """Получение количества участников розыгрыша"""
-    async with async_session() as session:
-        result = await session.execute(
-            select(func.count(Participant.id)).where(Participant.giveaway_id == giveaway_id)
-        )
-        return result.scalar()
+    async with _session_scope(session, readonly=True) as session:
+        # COUNT(*) отвечается по индексу (giveaway_id, user_id) без чтения строк таблицы
+        return await session.scalar(_PARTICIPANTS_COUNT_STMT, {"giveaway_id": giveaway_id})
 
 
-async def get_participants(giveaway_id: int) -> List[Participant]:
+async def get_participants(giveaway_id: int, session: Optional[AsyncSession] = None) -> List[Participant]:
     """Получение списка участников розыгрыша"""
-    async with async_session() as session:
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(
             select(Participant).where(Participant.giveaway_id == giveaway_id)
         )
         return result.scalars().all()
 
 
+def iter_participants(giveaway_id: int, session: Optional[AsyncSession] = None) -> AsyncIterator[Participant]:
+    """Участники розыгрыша потоком, порциями по _STREAM_BATCH строк."""
+    return _stream_scalars(select(Participant).where(Participant.giveaway_id == giveaway_id), session)
+
+
 # Функции для работы с победителями
 
-async def get_winners(giveaway_id: int) -> List[Winner]:
+async def get_winners(giveaway_id: int, session: Optional[AsyncSession] = None) -> List[Winner]:
     """Получение списка победителей розыгрыша"""
-    async with async_session() as session:
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(
             select(Winner)
             .where(Winner.giveaway_id == giveaway_id)
@@ -498,33 +908,34 @@ async def get_winners(giveaway_id: int) -> List[Winner]:
 
 
 async def add_winner(giveaway_id: int, user_id: int, place: int,
-                     username: str = None, first_name: str = None, full_name: str = None) -> bool:
+                     username: str = None, first_name: str = None, full_name: str = None, session: Optional[AsyncSession] = None) -> bool:
     """Добавление победителя"""
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         try:
-            winner = Winner(
-                giveaway_id=giveaway_id,
-                user_id=user_id,
-                username=username,
-                first_name=first_name,
-                full_name=full_name,
-                place=place
+            result = await session.execute(
+                sqlite_insert(Winner).values(
+                    giveaway_id=giveaway_id,
+                    user_id=user_id,
+                    username=username,
+                    first_name=first_name,
+                    full_name=full_name,
+                    place=place
+                ).on_conflict_do_nothing()
             )
-            session.add(winner)
             await session.commit()
-            return True
+            return result.rowcount == 1
         except IntegrityError:
             await session.rollback()
             return False
 
 
 async def add_channel_subscriber(channel_id: int, user_id: int, username: str = None, first_name: str = None,
-                                 full_name: str = None):
+                                 full_name: str = None, session: Optional[AsyncSession] = None):
     """
     Добавляет пользователя как подписчика канала.
     Если запись уже есть, но с left_at — обновляет её (считаем повторную подписку).
     """
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         try:
             # Проверяем, существует ли уже запись
             result = await session.execute(
@@ -566,8 +977,8 @@ async def add_channel_subscriber(channel_id: int, user_id: int, username: str =
 
 
 async def update_last_activity(channel_id: int, user_id: int, username: str = None, first_name: str = None,
-                               full_name: str = None):
-    async with async_session() as session:
+                               full_name: str = None, session: Optional[AsyncSession] = None):
+    async with _session_scope(session) as session:
         stmt = select(ChannelSubscriber).where(
             ChannelSubscriber.channel_id == channel_id,
             ChannelSubscriber.user_id == user_id,
@@ -587,58 +998,93 @@ async def update_last_activity(channel_id: int, user_id: int, username: str = No
             username=username,
             first_name=first_name,
             full_name=full_name,
+            session=session,
         )
         logging.info("Добавлен новый подписчик %s в канале %s", user_id, channel_id)
 
 
-async def get_active_subscribers(channel_id: int, days: int = 30) -> List[ChannelSubscriber]:
+def _days_ago(days: int):
+    """Момент «N дней назад» (UTC), вычисляемый самим SQLite: datetime('now', '-N days')."""
+    return func.datetime("now", f"-{int(days)} days")
+
+
+def _active_subscribers_stmt(channel_id: int, days: Optional[int]):
+    stmt = select(ChannelSubscriber).where(
+        ChannelSubscriber.channel_id == channel_id,
+        ChannelSubscriber.left_at.is_(None)
+    )
+    if days is not None:
+        stmt = stmt.where(ChannelSubscriber.last_activity_at >= _days_ago(days))
+    return stmt
+
+
+async def get_active_subscribers(channel_id: int, days: Optional[int] = 30,
+                                 session: Optional[AsyncSession] = None) -> List[ChannelSubscriber]:
     """
-    Возвращает пользователей, которые были активны за последние N дней.
-    Активность — участие в розыгрыше или комментарий.
+    Возвращает активных (не отписавшихся) подписчиков канала.
+    Если задан days — только тех, кто был активен за последние N дней
+    (участие в розыгрыше или комментарий); days=None — всех активных.
     """
-    cutoff = datetime.utcnow() - timedelta(days=days)
-    async with async_session() as session:
-        stmt = select(ChannelSubscriber).where(
-            ChannelSubscriber.channel_id == channel_id,
-            ChannelSubscriber.left_at.is_(None),
-            ChannelSubscriber.last_activity_at >= cutoff
-        )
-        result = await session.execute(stmt)
+    async with _session_scope(session, readonly=True) as session:
+        result = await session.execute(_active_subscribers_stmt(channel_id, days))
         return list(result.scalars().all())
 
 
-async def remove_channel_subscriber(channel_id: int, user_id: int) -> bool:
+def iter_active_subscribers(channel_id: int, days: Optional[int] = 30,
+                            session: Optional[AsyncSession] = None) -> AsyncIterator[ChannelSubscriber]:
+    """То же, что get_active_subscribers, но потоком — без списка всех подписчиков в памяти."""
+    return _stream_scalars(_active_subscribers_stmt(channel_id, days), session)
+
+
+async def get_active_subscriber_ids(channel_id: int, days: Optional[int] = 30,
+                                    session: Optional[AsyncSession] = None) -> List[int]:
+    """
+    user_id активных подписчиков канала — для рассылки, без создания ORM-объектов.
+    Результат читается потоком порциями по 1000 строк.
+
+    Args:
+        channel_id: ID канала
+        days: Только активные за последние N дней; None — все активные подписчики
+    """
+    stmt = select(ChannelSubscriber.user_id).where(
+        ChannelSubscriber.channel_id == channel_id,
+        ChannelSubscriber.left_at.is_(None)
+    )
+    if days is not None:
+        stmt = stmt.where(ChannelSubscriber.last_activity_at >= _days_ago(days))
+
+    async with _session_scope(session, readonly=True) as session:
+        result = await session.stream_scalars(stmt.execution_options(yield_per=1000))
+        return [user_id async for user_id in result]
+
+
+async def remove_channel_subscriber(channel_id: int, user_id: int, session: Optional[AsyncSession] = None) -> bool:
     """
     Отмечает пользователя как отписавшегося от канала (устанавливает left_at).
     """
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         try:
             result = await session.execute(
-                select(ChannelSubscriber).where(
+                update(ChannelSubscriber).where(
                     ChannelSubscriber.channel_id == channel_id,
                     ChannelSubscriber.user_id == user_id,
                     ChannelSubscriber.left_at.is_(None)  # Только активные
-                )
+                ).values(left_at=func.now()).returning(ChannelSubscriber.id)
             )
-            subscriber = result.scalar_one_or_none()
-
-            if subscriber:
-                subscriber.left_at = func.now()
-                await session.commit()
-                return True
-            return False
+            await session.commit()
+            return result.first() is not None
         except Exception as e:
             await session.rollback()
             print(f"Ошибка при удалении подписчика: {e}")
             return False
 
 
-async def get_channel_subscribers_count(channel_id: int, as_of: datetime = None) -> int:
+async def get_channel_subscribers_count(channel_id: int, as_of: datetime = None, session: Optional[AsyncSession] = None) -> int:
     """
     Получает количество *активных* подписчиков канала на указанную дату/время.
     Если as_of не указан — возвращает текущее количество.
     """
-    async with async_session() as session:
+    async with _session_scope(session, readonly=True) as session:
         query = select(func.count(ChannelSubscriber.id)).where(
             ChannelSubscriber.channel_id == channel_id,
             ChannelSubscriber.added_at <= (as_of or func.now())
@@ -657,25 +1103,11 @@ async def get_channel_subscribers_count(channel_id: int, as_of: datetime = None)
         return result.scalar_one()
 
 
-async def get_all_active_subscribers(channel_id: int) -> List[ChannelSubscriber]:
-    """
-    Возвращает список всех активных подписчиков канала.
-    """
-    async with async_session() as session:
-        result = await session.execute(
-            select(ChannelSubscriber).where(
-                ChannelSubscriber.channel_id == channel_id,
-                ChannelSubscriber.left_at.is_(None)
-            )
-        )
-        return result.scalars().all()
-
-
-async def was_user_subscriber(channel_id: int, user_id: int, at_time: datetime) -> bool:
+async def was_user_subscriber(channel_id: int, user_id: int, at_time: datetime, session: Optional[AsyncSession] = None) -> bool:
     """
     Проверяет, был ли пользователь подписчиком канала на определённый момент времени.
     """
-    async with async_session() as session:
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(
             select(ChannelSubscriber).where(
                 ChannelSubscriber.channel_id == channel_id,
@@ -695,18 +1127,15 @@ async def was_user_subscriber(channel_id: int, user_id: int, at_time: datetime)
 
 
 
-async def get_channel(channel_id: int) -> Optional[Channel]:
-    async with async_session() as session:
-        result = await session.execute(
-            select(Channel)
-            .options(selectinload(Channel.admin))  # ← Загружаем админа!
-            .where(Channel.channel_id == channel_id)
-        )
+async def get_channel(channel_id: int, session: Optional[AsyncSession] = None) -> Optional[Channel]:
+    async with _session_scope(session, readonly=True) as session:
+        # Вместе с каналом загружается админ, который его добавил
+        result = await session.execute(_GET_CHANNEL_STMT, {"channel_id": channel_id})
         return result.scalar_one_or_none()
 
 
 # Функции для работы с массовой рассылкой
-async def create_mailing(channel_id: int, admin_id: int, audience_type: str, message_text: str, total_users: int) -> Mailing:
+async def create_mailing(channel_id: int, admin_id: int, audience_type: str, message_text: str, total_users: int, session: Optional[AsyncSession] = None) -> Mailing:
     """
     Создание новой записи о рассылке.
     
@@ -720,7 +1149,7 @@ async def create_mailing(channel_id: int, admin_id: int, audience_type: str, mes
     Returns:
         Объект Mailing
     """
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         mailing = Mailing(
             channel_id=channel_id,
             admin_id=admin_id,
@@ -738,7 +1167,7 @@ async def create_mailing(channel_id: int, admin_id: int, audience_type: str, mes
         return mailing
 
 
-async def update_mailing_stats(mailing_id: int, sent: int, failed: int, blocked: int, status: str):
+async def update_mailing_stats(mailing_id: int, sent: int, failed: int, blocked: int, status: str, session: Optional[AsyncSession] = None):
     """
     Обновление статистики и статуса рассылки.
     
@@ -749,7 +1178,7 @@ async def update_mailing_stats(mailing_id: int, sent: int, failed: int, blocked:
         blocked: Количество пользователей, заблокировавших бота
         status: Новый статус ("pending", "sending", "done", "cancelled")
     """
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         await session.execute(
             update(Mailing)
             .where(Mailing.id == mailing_id)
@@ -765,7 +1194,7 @@ async def update_mailing_stats(mailing_id: int, sent: int, failed: int, blocked:
 
 
 
-async def get_mailing(mailing_id: int) -> Optional[Mailing]:
+async def get_mailing(mailing_id: int, session: Optional[AsyncSession] = None) -> Optional[Mailing]:
     """
     Получение информации о рассылке по ID.
     
@@ -775,15 +1204,12 @@ async def get_mailing(mailing_id: int) -> Optional[Mailing]:
     Returns:
         Объект Mailing или None, если не найден
     """
-    async with async_session() as session:
-        result = await session.execute(
-            select(Mailing).where(Mailing.id == mailing_id)
-        )
-        return result.scalar_one_or_none()
+    async with _session_scope(session, readonly=True) as session:
+        return await session.get(Mailing, mailing_id)
 
 
 
-async def get_mailings_by_channel(channel_id: int) -> List[Mailing]:
+async def get_mailings_by_channel(channel_id: int, session: Optional[AsyncSession] = None) -> List[Mailing]:
     """
     Получение всех рассылок для канала.
     
@@ -793,7 +1219,7 @@ async def get_mailings_by_channel(channel_id: int) -> List[Mailing]:
     Returns:
         Список объектов Mailing, отсортированный по дате создания (новые первыми)
     """
-    async with async_session() as session:
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(
             select(Mailing)
             .where(Mailing.channel_id == channel_id)
@@ -803,7 +1229,7 @@ async def get_mailings_by_channel(channel_id: int) -> List[Mailing]:
 
 
 
-async def get_active_mailing(channel_id: int) -> Optional[Mailing]:
+async def get_active_mailing(channel_id: int, session: Optional[AsyncSession] = None) -> Optional[Mailing]:
     """
     Проверка, есть ли активная рассылка для канала.
     
@@ -813,7 +1239,7 @@ async def get_active_mailing(channel_id: int) -> Optional[Mailing]:
     Returns:
         Объект Mailing со статусом "sending" или None
     """
-    async with async_session() as session:
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(
             select(Mailing)
             .where(
@@ -823,22 +1249,21 @@ async def get_active_mailing(channel_id: int) -> Optional[Mailing]:
         )
         return result.scalar_one_or_none()
 
-async def get_channel_for_discussion_group(discussion_group_id: int) -> Optional[Channel]:
+async def get_channel_for_discussion_group(discussion_group_id: int, session: Optional[AsyncSession] = None) -> Optional[Channel]:
     """Получает основой канал для по discussion_group_id"""
-    async with async_session() as session:
+    async with _session_scope(session, readonly=True) as session:
         result = await session.execute(
-            select(Channel).
-            where(Channel.discussion_group_id == discussion_group_id)
+            _CHANNEL_FOR_DISCUSSION_STMT, {"discussion_group_id": discussion_group_id}
         )
         return result.scalar_one_or_none()
 
 
 # ==================== ФУНКЦИИ ДЛЯ ПАРСИНГА ПОДПИСЧИКОВ ====================
 
-async def bulk_add_channel_subscribers(channel_id: int, subscribers: List[Dict]) -> Tuple[int, int]:
+async def bulk_add_channel_subscribers(channel_id: int, subscribers: List[Dict], session: Optional[AsyncSession] = None) -> Tuple[int, int]:
     """
-    Массовое добавление подписчиков канала с оптимизированной batch-вставкой.
-    Обновляет существующие записи (вернувшихся пользователей).
+    Массовое добавление подписчиков канала одним UPSERT на batch.
+    Обновляет существующие записи (вернувшихся пользователей), активных не трогает.
 
     Args:
         channel_id: ID канала
@@ -853,49 +1278,55 @@ async def bulk_add_channel_subscribers(channel_id: int, subscribers: List[Dict])
 
     added_count = 0
     updated_count = 0
-    batch_size = 100  # Оптимизированный размер batch для SQLite
+    batch_size = _BULK_BATCH
 
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         try:
             for i in range(0, len(subscribers), batch_size):
-                batch = subscribers[i:i + batch_size]
-
-                for sub_data in batch:
+                # Дубликаты user_id внутри batch: учитываем только первое вхождение
+                rows = {}
+                for sub_data in subscribers[i:i + batch_size]:
                     user_id = sub_data.get("user_id")
-                    if not user_id:
+                    if not user_id or user_id in rows:
                         continue
-
-                    # Проверяем, существует ли запись
-                    result = await session.execute(
-                        select(ChannelSubscriber).where(
-                            ChannelSubscriber.channel_id == channel_id,
-                            ChannelSubscriber.user_id == user_id
-                        )
+                    rows[user_id] = {
+                        "channel_id": channel_id,
+                        "user_id": user_id,
+                        "username": sub_data.get("username"),
+                        "first_name": sub_data.get("first_name"),
+                        "full_name": sub_data.get("full_name"),
+                    }
+                if not rows:
+                    continue
+
+                # Сколько из batch вернувшихся (отписавшихся ранее) — они будут обновлены
+                returning_result = await session.execute(
+                    select(func.count(ChannelSubscriber.id)).where(
+                        ChannelSubscriber.channel_id == channel_id,
+                        ChannelSubscriber.user_id.in_(rows.keys()),
+                        ChannelSubscriber.left_at.isnot(None)
                     )
-                    existing = result.scalar_one_or_none()
-
-                    if existing:
-                        # Пользователь уже есть в базе
-                        if existing.left_at is not None:
-                            # Пользователь отписался - обновляем как вернувшегося
-                            existing.left_at = None
-                            existing.username = sub_data.get("username")
-                            existing.first_name = sub_data.get("first_name")
-                            existing.full_name = sub_data.get("full_name")
-                            existing.added_at = datetime.now()
-                            updated_count += 1
-                        # Если уже активен - ничего не делаем (не считаем как updated)
-                    else:
-                        # Новый подписчик
-                        subscriber = ChannelSubscriber(
-                            channel_id=channel_id,
-                            user_id=user_id,
-                            username=sub_data.get("username"),
-                            first_name=sub_data.get("first_name"),
-                            full_name=sub_data.get("full_name")
-                        )
-                        session.add(subscriber)
-                        added_count += 1
+                )
+                batch_updated = returning_result.scalar() or 0
+
+                stmt = sqlite_insert(ChannelSubscriber).values(list(rows.values()))
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["channel_id", "user_id"],
+                    set_={
+                        "left_at": None,
+                        "username": stmt.excluded.username,
+                        "first_name": stmt.excluded.first_name,
+                        "full_name": stmt.excluded.full_name,
+                        "added_at": func.now(),
+                    },
+                    # Уже активные подписчики не обновляются и не попадают в RETURNING
+                    where=ChannelSubscriber.left_at.isnot(None),
+                ).returning(ChannelSubscriber.id)
+                result = await session.execute(stmt)
+                affected = len(result.all())
+
+                updated_count += batch_updated
+                added_count += affected - batch_updated
 
             await session.commit()
             logging.info(f"Batch insert completed for channel {channel_id}: added={added_count}, updated={updated_count}")
@@ -909,7 +1340,7 @@ async def bulk_add_channel_subscribers(channel_id: int, subscribers: List[Dict])
 
 
 
-async def get_channel_subscribers_stats(channel_id: int) -> Dict[str, int]:
+async def get_channel_subscribers_stats(channel_id: int, session: Optional[AsyncSession] = None) -> Dict[str, int]:
     """
     Получение статистики по подписчикам канала.
 
@@ -920,33 +1351,18 @@ async def get_channel_subscribers_stats(channel_id: int) -> Dict[str, int]:
         - with_username: количество с username
         - without_username: количество без username (только активные)
     """
-    async with async_session() as session:
-        # Общее количество записей
-        total_result = await session.execute(
-            select(func.count(ChannelSubscriber.id)).where(
-                ChannelSubscriber.channel_id == channel_id
-            )
-        )
-        total = total_result.scalar() or 0
-
-        # Активные подписчики (не отписавшиеся)
-        active_result = await session.execute(
-            select(func.count(ChannelSubscriber.id)).where(
-                ChannelSubscriber.channel_id == channel_id,
-                ChannelSubscriber.left_at.is_(None)
-            )
-        )
-        active = active_result.scalar() or 0
-
-        # Активные с username
-        with_username_result = await session.execute(
-            select(func.count(ChannelSubscriber.id)).where(
-                ChannelSubscriber.channel_id == channel_id,
-                ChannelSubscriber.left_at.is_(None),
-                ChannelSubscriber.username.isnot(None)
-            )
+    async with _session_scope(session, readonly=True) as session:
+        # Один проход: COUNT(*) FILTER (WHERE ...) вместо трёх COUNT по тем же строкам;
+        # в отличие от SUM(CASE ...) на пустом канале даёт 0, а не NULL
+        is_active = ChannelSubscriber.left_at.is_(None)
+        result = await session.execute(
+            select(
+                func.count(),
+                func.count().filter(is_active),
+                func.count().filter(and_(is_active, ChannelSubscriber.username.isnot(None)))
+            ).where(ChannelSubscriber.channel_id == channel_id)
         )
-        with_username = with_username_result.scalar() or 0
+        total, active, with_username = result.one()
 
         # Активные без username
         without_username = active - with_username
@@ -959,7 +1375,7 @@ async def get_channel_subscribers_stats(channel_id: int) -> Dict[str, int]:
         }
 
 
-async def clear_channel_subscribers(channel_id: int) -> int:
+async def clear_channel_subscribers(channel_id: int, session: Optional[AsyncSession] = None) -> int:
     """
     Полная очистка всех данных о подписчиках канала.
 
@@ -969,28 +1385,21 @@ async def clear_channel_subscribers(channel_id: int) -> int:
     Returns:
         Количество удаленных записей
     """
-    async with async_session() as session:
-        # Получаем количество записей для возврата
+    async with _session_scope(session) as session:
+        # Один DELETE: количество удалённых строк берём из rowcount, без отдельного COUNT
         result = await session.execute(
-            select(func.count(ChannelSubscriber.id)).where(
-                ChannelSubscriber.channel_id == channel_id
-            )
-        )
-        count = result.scalar() or 0
-
-        # Удаляем все записи
-        await session.execute(
-            delete(ChannelSubscriber).where(
-                ChannelSubscriber.channel_id == channel_id
-            )
+            delete(ChannelSubscriber)
+            .where(ChannelSubscriber.channel_id == channel_id)
+            .execution_options(synchronize_session=False)
         )
+        count = result.rowcount
         await session.commit()
 
         logging.info(f"Cleared {count} subscribers for channel {channel_id}")
         return count
 
 
-async def update_existing_subscribers(channel_id: int, subscribers: List[Dict]) -> int:
+async def update_existing_subscribers(channel_id: int, subscribers: List[Dict], session: Optional[AsyncSession] = None) -> int:
     """
     Обновление данных существующих активных подписчиков канала.
     В отличие от bulk_add, не добавляет новых подписчиков.
@@ -1006,33 +1415,39 @@ async def update_existing_subscribers(channel_id: int, subscribers: List[Dict])
         return 0
 
     updated_count = 0
-    batch_size = 100
+    batch_size = _BULK_BATCH
 
-    async with async_session() as session:
+    async with _session_scope(session) as session:
         try:
             for i in range(0, len(subscribers), batch_size):
-                batch = subscribers[i:i + batch_size]
-
-                for sub_data in batch:
+                rows = {}
+                for sub_data in subscribers[i:i + batch_size]:
                     user_id = sub_data.get("user_id")
-                    if not user_id:
+                    if not user_id or user_id in rows:
                         continue
-
-                    result = await session.execute(
-                        select(ChannelSubscriber).where(
-                            ChannelSubscriber.channel_id == channel_id,
-                            ChannelSubscriber.user_id == user_id,
-                            ChannelSubscriber.left_at.is_(None)  # Только активные
-                        )
+                    rows[user_id] = {
+                        "b_username": sub_data.get("username"),
+                        "b_first_name": sub_data.get("first_name"),
+                        "b_full_name": sub_data.get("full_name"),
+                    }
+                if not rows:
+                    continue
+
+                # Один запрос: первичные ключи активных подписчиков из batch,
+                # дальше UPDATE идёт по id, а не по (channel_id, user_id)
+                result = await session.execute(
+                    select(ChannelSubscriber.id, ChannelSubscriber.user_id).where(
+                        ChannelSubscriber.channel_id == channel_id,
+                        ChannelSubscriber.user_id.in_(rows.keys()),
+                        ChannelSubscriber.left_at.is_(None)  # Только активные
                     )
-                    existing = result.scalar_one_or_none()
+                )
+                params = [{"b_id": pk, **rows[user_id]} for pk, user_id in result.all()]
+                if not params:
+                    continue
 
-                    if existing:
-                        # Обновляем данные
-                        existing.username = sub_data.get("username")
-                        existing.first_name = sub_data.get("first_name")
-                        existing.full_name = sub_data.get("full_name")
-                        updated_count += 1
+                await session.execute(_UPDATE_SUBSCRIBER_PROFILE_STMT, params)
+                updated_count += len(params)
 
             await session.commit()
             logging.info(f"Updated {updated_count} existing subscribers for channel {channel_id}")
@@ -1043,4 +1458,3 @@ async def update_existing_subscribers(channel_id: int, subscribers: List[Dict])
             raise
 
     return updated_count
-
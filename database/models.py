@@ -4,10 +4,10 @@ from typing import Optional, List
 
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime, Boolean,
-    ForeignKey, BigInteger, create_engine, UniqueConstraint
+    ForeignKey, BigInteger, create_engine, UniqueConstraint, Index, text, select, func
 )
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker, backref, column_property
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
 Base = declarative_base()
@@ -26,7 +26,7 @@ class Admin(Base):
     
     id = Column(Integer, primary_key=True)
     user_id = Column(BigInteger, unique=True, nullable=False)  # Telegram User ID
-    username = Column(String(255), nullable=True)
+    username = Column(String(255), nullable=True, index=True)  # индекс: проверка админа по @username
     first_name = Column(String(255), nullable=True)
     full_name = Column(String(255), nullable=True)
     is_main_admin = Column(Boolean, default=False)  # Главный админ
@@ -63,9 +63,18 @@ class ChannelSubscriber(Base):
     left_at = Column(DateTime)
     last_activity_at = Column(DateTime, nullable=True)
 
-    # Уникальность: один пользователь — одна запись на канал
+    # Уникальность: один пользователь — одна запись на канал;
+    # индекс для выборки активных подписчиков по last_activity_at;
+    # частичный индекс только по активным (left_at IS NULL) — поиск пользователей
+    # канала не проходит по строкам отписавшихся
     __table_args__ = (
         UniqueConstraint('channel_id', 'user_id', name='unique_channel_user'),
+        Index('ix_subscriber_channel_left_activity', 'channel_id', 'left_at', 'last_activity_at'),
+        Index(
+            'ix_subscriber_active', 'channel_id', 'user_id',
+            sqlite_where=text('left_at IS NULL'),
+            postgresql_where=text('left_at IS NULL'),
+        ),
     )
 
 class Giveaway(Base):
@@ -103,9 +112,10 @@ class Giveaway(Base):
     channel = relationship("Channel", backref="giveaways")
     creator = relationship("Admin", backref="created_giveaways")
 
-    @property
-    def participants_count(self) -> int:
-        return len(self.participants) if hasattr(self, 'participants') else 0
+    # Индекс для подсчёта и сортировки завершенных розыгрышей по end_time
+    __table_args__ = (
+        Index('ix_giveaway_status_end_time', 'status', 'end_time'),
+    )
 
 
 class Participant(Base):
@@ -113,7 +123,7 @@ class Participant(Base):
     __tablename__ = "participants"
     
     id = Column(Integer, primary_key=True)
-    giveaway_id = Column(Integer, ForeignKey('giveaways.id'), nullable=False)
+    giveaway_id = Column(Integer, ForeignKey('giveaways.id', ondelete="CASCADE"), nullable=False)
     user_id = Column(BigInteger, nullable=False)
     username = Column(String(255), nullable=True)
     first_name = Column(String(255), nullable=True)
@@ -121,10 +131,13 @@ class Participant(Base):
     joined_at = Column(DateTime, default=datetime.utcnow)
     
     # Связь с розыгрышем
-    giveaway = relationship("Giveaway", backref="participants")
+    giveaway = relationship(
+        "Giveaway", backref=backref("participants", cascade="all, delete-orphan", passive_deletes=True)
+    )
     
     # Уникальный индекс: один пользователь - один розыгрыш
     __table_args__ = (
+        Index('unique_giveaway_participant', 'giveaway_id', 'user_id', unique=True),
         {'sqlite_autoincrement': True},
     )
 
@@ -134,7 +147,7 @@ class Winner(Base):
     __tablename__ = "winners"
     
     id = Column(Integer, primary_key=True)
-    giveaway_id = Column(Integer, ForeignKey('giveaways.id'), nullable=False)
+    giveaway_id = Column(Integer, ForeignKey('giveaways.id', ondelete="CASCADE"), nullable=False)
     user_id = Column(BigInteger, nullable=False)
     username = Column(String(255), nullable=True)
     first_name = Column(String(255), nullable=True)
@@ -143,14 +156,28 @@ class Winner(Base):
     won_at = Column(DateTime, default=datetime.utcnow)
     
     # Связь с розыгрышем
-    giveaway = relationship("Giveaway", backref="winners")
+    giveaway = relationship(
+        "Giveaway", backref=backref("winners", cascade="all, delete-orphan", passive_deletes=True)
+    )
     
     # Уникальный индекс: одно место в одном розыгрыше
     __table_args__ = (
+        Index('unique_giveaway_winner_place', 'giveaway_id', 'place', unique=True),
         {'sqlite_autoincrement': True},
     )
 
 
+# Количество участников — коррелированный COUNT по индексу участников вместо загрузки
+# всей коллекции participants. deferred: считается только при undefer(Giveaway.participants_count)
+Giveaway.participants_count = column_property(
+    select(func.count(Participant.id))
+    .where(Participant.giveaway_id == Giveaway.id)
+    .correlate_except(Participant)
+    .scalar_subquery(),
+    deferred=True,
+)
+
+
 class MailingStatus(Enum):
     """Статусы массовой рассылки"""
     PENDING = "pending"     # Ожидает запуска
@@ -28,11 +28,13 @@ def register_dialogs(dp: Dispatcher) -> None:
     """
     Регистрация всех диалогов в Dispatcher.
     """
-    dp.include_router(admin_main_dialog)
-    dp.include_router(create_giveaway_dialog)
-    dp.include_router(admin_management_dialog)
-    dp.include_router(channels_dialog)
-    dp.include_router(giveaway_view_dialog)
-    dp.include_router(giveaway_edit_dialog)
-    dp.include_router(mailing_dialog)
+    dp.include_routers(
+        admin_main_dialog,
+        create_giveaway_dialog,
+        admin_management_dialog,
+        channels_dialog,
+        giveaway_view_dialog,
+        giveaway_edit_dialog,
+        mailing_dialog,
+    )
 
@@ -10,7 +10,9 @@
 """
 
 import logging
-from typing import Any, Dict, List
+import re
+from functools import lru_cache
+from typing import Any, Dict, Tuple
 
 from aiogram.types import Message, CallbackQuery
 
@@ -21,34 +23,56 @@ from aiogram_dialog.widgets.text import Const, Format
 
 from states.admin_states import AdminDialogStates, AdminStates
 from texts.messages import MESSAGES, BUTTONS, ADMIN_USER_ITEM
-from database.database import get_all_admins, add_admin, remove_admin, is_admin
-from database.models import Admin
+from database.database import get_all_admins_core, get_admin_by_username, add_admin, remove_admin
 
+# Ввод при добавлении админа: @username, [https://]t.me/username или числовой user_id —
+# один проход регулярки вместо цепочки startswith/in/isdigit
+_ADMIN_INPUT_RE = re.compile(
+    r"^(?:@(?P<at>[A-Za-z0-9_]+)|(?:https?://)?t\.me/(?P<link>[A-Za-z0-9_]+)/?|(?P<id>[0-9]+))$"
+)
 
-async def admins_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
-    """Геттер для списка администраторов."""
-    admins = await get_all_admins()
-    removable_admins: List[Admin] = [a for a in admins if not a.is_main_admin]
 
+_format_admin_item = ADMIN_USER_ITEM.format_map
+_format_current_admins = MESSAGES["current_admins"].format_map
+
+
+@lru_cache(maxsize=8)
+def _render_admins_text(admins: Tuple[Any, ...]) -> str:
+    """
+    Текст списка администраторов. Строки Row хешируемы, а сам список кэширован
+    в get_all_admins_core, поэтому повторные отрисовки окна не форматируют шаблоны заново.
+    """
     admin_list_lines = []
     for admin in admins:
-        admin_info = ADMIN_USER_ITEM.format(
-            name=admin.first_name or "Без имени",
-            username=admin.username or "без username",
-            user_id=admin.user_id,
-        )
+        admin_info = _format_admin_item({
+            "name": admin.first_name or "Без имени",
+            "username": admin.username or "без username",
+            "user_id": admin.user_id,
+        })
         if admin.is_main_admin:
             admin_info += "\n👑 <b>Главный администратор</b>"
         admin_list_lines.append(admin_info)
 
-    admins_text = (
-        MESSAGES["current_admins"].format(admins="\n\n".join(admin_list_lines))
-        if admin_list_lines
-        else "👥 Администраторов не найдено"
-    )
+    if not admin_list_lines:
+        return "👥 Администраторов не найдено"
+    return _format_current_admins({"admins": "\n\n".join(admin_list_lines)})
+
+
+async def admins_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
+    """Геттер для списка администраторов."""
+    admins = await get_all_admins_core()
+    # Подпись кнопки считается один раз здесь: в Format нельзя условно опустить пустой username
+    removable_admins = [
+        {
+            "user_id": a.user_id,
+            "display": f"{a.first_name} (@{a.username})" if a.username else f"{a.first_name}",
+        }
+        for a in admins
+        if not a.is_main_admin
+    ]
 
     return {
-        "admins_text": admins_text,
+        "admins_text": _render_admins_text(tuple(admins)),
         "removable_admins": removable_admins,
     }
 
@@ -68,8 +92,10 @@ async def go_to_add_admin(callback: CallbackQuery, button: Button, manager: Dial
 async def go_to_choose_remove(callback: CallbackQuery, button: Button, manager: DialogManager) -> None:
     """Переход к выбору администратора для удаления."""
     await callback.answer()
-    data = await admins_getter(manager)
-    if not data["removable_admins"]:
+    # Список админов кэширован (get_all_admins_core): геттер окна выбора возьмёт его из кэша,
+    # поэтому здесь только проверка без форматирования текста списка
+    admins = await get_all_admins_core()
+    if not any(not admin.is_main_admin for admin in admins):
         await callback.answer("Нет администраторов для удаления", show_alert=True)
         return
     await manager.switch_to(AdminDialogStates.CHOOSE_ADMIN_TO_REMOVE)
@@ -89,46 +115,39 @@ async def on_add_admin_input(message: Message, widget: MessageInput, manager: Di
     - t.me/username или https://t.me/username
     - числовой user_id
     """
-    text = (message.text or "").strip()
-    username = None
-
-    if text.startswith("@"):
-        username = text[1:]
-    elif "t.me/" in text:
-        start = text.rfind("/") + 1
-        username = text[start:]
-    elif text.isdigit():
-        # Добавление по ID без разрешения username
-        try:
-            user_id = int(text)
-        except ValueError:
-            await message.answer(MESSAGES["invalid_username_or_id"])
-            return
+    match = _ADMIN_INPUT_RE.match((message.text or "").strip())
+    if not match:
+        await message.answer(MESSAGES["invalid_username_or_id"])
+        return
 
-        if await is_admin(user_id):
-            await message.answer(MESSAGES["admin_already_exists"])
+    if match["id"]:
+        # Добавление по ID без разрешения username
+        user_id = int(match["id"])
+
+        # add_admin сам не добавит существующего админа (ON CONFLICT DO NOTHING) — без отдельной проверки
+        success = await add_admin(
+            user_id=user_id,
+            username=None,
+            first_name=f"ID: {user_id}",
+            full_name=f"ID: {user_id}",
+        )
+        if success:
+            await message.answer(MESSAGES["admin_added"])
         else:
-            success = await add_admin(
-                user_id=user_id,
-                username=None,
-                first_name=f"ID: {user_id}",
-                full_name=f"ID: {user_id}",
-            )
-            if success:
-                await message.answer(MESSAGES["admin_added"])
-            else:
-                await message.answer(MESSAGES["admin_already_exists"])
+            await message.answer(MESSAGES["admin_already_exists"])
 
         await manager.switch_to(AdminDialogStates.MAIN_MENU)
         return
 
-    if not username:
-        await message.answer(MESSAGES["invalid_username_or_id"])
-        return
+    username = match["at"] or match["link"]
+
+    # Админ с таким username в БД — только подсказка: username мог перейти к другому
+    # пользователю, поэтому владельца всё равно определяем через get_chat и сверяем user_id
+    known_admin = await get_admin_by_username(username)
 
     # Пытаемся получить информацию о пользователе через get_chat
     try:
-        chat = await message.bot.get_chat(f"@{username}" if not username.startswith("@") else username)
+        chat = await message.bot.get_chat(f"@{username}")
         if chat.type != "private":
             await message.answer("❌ Указанная ссылка ведёт не на пользователя.")
             return
@@ -136,19 +155,16 @@ async def on_add_admin_input(message: Message, widget: MessageInput, manager: Di
         user_id = chat.id
         full_name = f"{chat.first_name} {chat.last_name}" if chat.last_name else chat.first_name
 
-        if await is_admin(user_id):
-            await message.answer(MESSAGES["admin_already_exists"])
+        success = (known_admin is None or known_admin.user_id != user_id) and await add_admin(
+            user_id=user_id,
+            username=chat.username,
+            first_name=chat.first_name,
+            full_name=full_name,
+        )
+        if success:
+            await message.answer(MESSAGES["admin_added"])
         else:
-            success = await add_admin(
-                user_id=user_id,
-                username=chat.username,
-                first_name=chat.first_name,
-                full_name=full_name,
-            )
-            if success:
-                await message.answer(MESSAGES["admin_added"])
-            else:
-                await message.answer(MESSAGES["admin_already_exists"])
+            await message.answer(MESSAGES["admin_already_exists"])
 
     except Exception as e:
         logging.warning(f"Не удалось найти пользователя по username '{username}': {e}")
@@ -218,9 +234,9 @@ admin_management_dialog = Dialog(
     Window(
         Const(MESSAGES["choose_admin_to_remove"]),
         Select(
-            Format("{item.first_name} (@{item.username})" if "{item.username}" else "{item.first_name}"),
+            Format("{item[display]}"),
             id="admin_to_remove_select",
-            item_id_getter=lambda a: str(a.user_id),
+            item_id_getter=lambda a: str(a["user_id"]),
             items="removable_admins",
             on_click=on_remove_admin_selected,
         ),
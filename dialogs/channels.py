@@ -13,20 +13,30 @@
 
 import asyncio
 import logging
-from typing import Any, Dict
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
 
+from aiogram.enums import ChatMemberStatus, ChatType
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from aiogram.types import Message, CallbackQuery
 
 from aiogram_dialog import Dialog, DialogManager, Window, StartMode, ShowMode
 from aiogram_dialog.widgets.input import MessageInput
-from aiogram_dialog.widgets.kbd import Button, Row, Select
-from aiogram_dialog.widgets.text import Const, Format
+from aiogram_dialog.widgets.kbd import (
+    Button, Column, Row, Select, StubScroll, PrevPage, CurrentPage, NextPage,
+)
+from aiogram_dialog.widgets.text import Const, Format, Text
 
+from pyrogram_app.parsing_mode import ParsingMode
+from pyrogram_app.pyro_client import get_pyrogram_client
 from states.admin_states import ChannelDialogStates, AdminStates
-from texts.messages import MESSAGES, BUTTONS, ADMIN_CHANNEL_ITEM, CHANNEL_DETAIL_TEXT
+from texts.messages import MESSAGES, BUTTONS, format_channel_detail
+from database.cache import cached_with_ttl
 from database.database import (
-    get_all_channels, add_channel, remove_channel,
-    add_channel_by_username, bulk_add_channel_subscribers,
+    get_all_channels_core, add_channel, remove_channel,
+    add_channel_by_username, bulk_add_channel_subscribers, channel_exists, channels_count,
     get_channel, get_channel_subscribers_stats,
 )
 
@@ -34,37 +44,59 @@ from database.database import (
 #  Getters
 # ---------------------------------------------------------------------------
 
-async def channels_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
-    """Геттер для списка каналов."""
-    channels = await get_all_channels()
-
-    channel_list = []
-    for channel in channels:
-        admin_name = "Неизвестно"
-        if channel.admin:
-            admin_name = channel.admin.first_name or f"ID: {channel.added_by}"
-            if channel.admin.username:
-                admin_name += f" (@{channel.admin.username})"
-
-        channel_info = ADMIN_CHANNEL_ITEM.format(
-            name=channel.channel_name,
-            username=f"@{channel.channel_username}" if channel.channel_username else "Без username",
-            admin=admin_name,
-        )
-        channel_list.append(channel_info)
+_UNKNOWN_ADMIN = "Неизвестно"
+_BOT_ADMIN_STATUSES = frozenset({ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR})
+
+# Не больше 20 одновременных запросов к Bot API из этого диалога (get_chat*, права бота):
+# всплеск не выбирает весь пул соединений aiohttp-сессии бота
+_BOT_API_SEM = asyncio.Semaphore(20)
+
+# @username, t.me/username или просто username (5–32 символа по правилам Telegram)
+_CHANNEL_INPUT_RE = re.compile(r"^(?:@|(?:https?://)?t\.me/)?(?P<username>[A-Za-z][A-Za-z0-9_]{4,31})/?$")
+
+
+def _added_by_text(first_name: Optional[str], username: Optional[str], added_by: int) -> str:
+    """Кто добавил канал: имя админа (или его ID) и @username, если есть — одной строкой."""
+    name = first_name or f"ID: {added_by}"
+    return f"{name} (@{username})" if username else name
 
-    channel_text = (
-        MESSAGES["current_channels"].format(channels="\n\n".join(channel_list))
-        if channel_list
-        else "📺 Каналов не найдено"
-    )
 
+class _ChannelTitle(Text):
+    """Название канала для кнопки Select: с @username, если он есть."""
+
+    async def _render_text(self, data: Dict[str, Any], manager: DialogManager) -> str:
+        channel = data["item"]
+        if channel.channel_username:
+            return f"{channel.channel_name} (@{channel.channel_username})"
+        return channel.channel_name
+
+
+# Каналов на одной странице списка (Select с постраничной прокруткой)
+_CHANNELS_PAGE_SIZE = 8
+
+
+async def _channels_page(dialog_manager: DialogManager, scroll_id: str, channels) -> Dict[str, Any]:
+    """
+    Текущая страница списка каналов для StubScroll: в окно и в форматирование
+    попадают только _CHANNELS_PAGE_SIZE строк, а не весь список.
+    """
+    pages = max((len(channels) + _CHANNELS_PAGE_SIZE - 1) // _CHANNELS_PAGE_SIZE, 1)
+    # После удаления канала страниц может стать меньше — остаёмся на последней
+    page = min(await dialog_manager.find(scroll_id).get_page(), pages - 1)
+    start = page * _CHANNELS_PAGE_SIZE
     return {
-        "channels": channels,
-        "channels_text": channel_text,
+        "channels": channels[start:start + _CHANNELS_PAGE_SIZE],
+        "pages": pages,
+        "has_pages": pages > 1,
     }
 
 
+async def channels_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
+    """Геттер для списка каналов (постранично)."""
+    channels = await get_all_channels_core()
+    return await _channels_page(dialog_manager, "channels_remove_scroll", channels)
+
+
 async def ask_parse_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
     """Геттер для окна предложения парсинга."""
     channel_name = dialog_manager.dialog_data.get("parse_channel_name", "")
@@ -73,23 +105,29 @@ async def ask_parse_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str,
     }
 
 
+# Все 11 вариантов полосы прогресса и шаблон окна — собираются один раз при импорте
+_PROGRESS_BARS = tuple("\u2588" * i + "\u2591" * (10 - i) for i in range(11))
+_PROGRESS_TEMPLATE = (
+    "\u23f3 <b>Парсинг в процессе...</b>\n\n"
+    "\U0001f4fa Канал: {channel}\n"
+    "\U0001f465 Обработано: {parsed}/{total}\n"
+    "\U0001f4c8 [{bar}] {percent}%\n\n"
+    "<i>Пожалуйста, подождите...</i>"
+)
+
+
 async def parsing_progress_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
     """Геттер для окна прогресса парсинга."""
     dd = dialog_manager.dialog_data
     parsed = dd.get("parsed", 0)
     total = dd.get("total", 1) or 1
-    channel_name = dd.get("parse_channel_name", "")
 
-    percent = min(parsed / total * 100, 100)
-    filled = int(percent / 10)
-    bar = "\u2588" * filled + "\u2591" * (10 - filled)
-
-    progress_text = (
-        f"\u23f3 <b>Парсинг в процессе...</b>\n\n"
-        f"\U0001f4fa Канал: {channel_name}\n"
-        f"\U0001f465 Обработано: {parsed}/{total}\n"
-        f"\U0001f4c8 [{bar}] {percent:.0f}%\n\n"
-        f"<i>Пожалуйста, подождите...</i>"
+    progress_text = _PROGRESS_TEMPLATE.format(
+        channel=dd.get("parse_channel_name", ""),
+        parsed=parsed,
+        total=total,
+        bar=_PROGRESS_BARS[min(parsed * 10 // total, 10)],
+        percent=min(parsed * 100 // total, 100),
     )
     return {"progress_text": progress_text}
 
@@ -125,9 +163,39 @@ async def parsing_complete_getter(dialog_manager: DialogManager, **kwargs) -> Di
 
 
 async def channel_list_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
-    """Геттер для списка каналов (Select)."""
-    channels = await get_all_channels()
-    return {"channels": channels}
+    """Геттер для списка каналов (Select, постранично)."""
+    channels = await get_all_channels_core()
+    return await _channels_page(dialog_manager, "channels_view_scroll", channels)
+
+
+_ADMIN_ROLES = {ChatMemberStatus.CREATOR: "владелец"}
+
+
+def _format_chat_admin(admin) -> str:
+    """Строка администратора канала для карточки."""
+    user = admin.user
+    username = f" (@{user.username})" if user.username else ""
+    return (
+        f"  {'🤖' if user.is_bot else '👤'} {user.first_name or ''}{username}"
+        f" — <i>{_ADMIN_ROLES.get(admin.status, 'админ')}</i>"
+    )
+
+
+@lru_cache(maxsize=256)
+def _format_created_at(created_at: datetime) -> str:
+    """Дата добавления канала для карточки (strftime один раз на значение)."""
+    return created_at.strftime("%d.%m.%Y %H:%M")
+
+
+@cached_with_ttl(ttl=60, key_builder=lambda f, bot, chat_id: f"{f.__qualname__}:{bot.id}:{chat_id}")
+async def _channel_admins_text(bot, chat_id: int) -> str:
+    """
+    Список администраторов канала из Telegram API, уже отформатированный для карточки.
+    Кэшируется на 60 секунд: повторные просмотры канала не обращаются к Bot API.
+    """
+    async with _BOT_API_SEM:
+        admins = await bot.get_chat_administrators(chat_id)
+    return "\n".join(map(_format_chat_admin, admins)) or "Нет данных"
 
 
 async def channel_info_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
@@ -136,47 +204,40 @@ async def channel_info_getter(dialog_manager: DialogManager, **kwargs) -> Dict[s
     if not channel_id:
         return {"detail_text": "❌ Канал не найден"}
 
-    channel = await get_channel(channel_id)
+    # Администраторы из Telegram API, канал и статистика подписчиков независимы —
+    # запрашиваем их одновременно (каждый запрос к БД в своей read-сессии)
+    bot = dialog_manager.middleware_data["bot"]
+    admins_task = asyncio.create_task(_channel_admins_text(bot, channel_id))
+    try:
+        channel, stats = await asyncio.gather(
+            get_channel(channel_id),
+            get_channel_subscribers_stats(channel_id),
+        )
+    except BaseException:
+        admins_task.cancel()
+        raise
     if not channel:
+        admins_task.cancel()
         return {"detail_text": "❌ Канал не найден в базе"}
 
-    # Статистика подписчиков
-    stats = await get_channel_subscribers_stats(channel_id)
-
     # Кто добавил
-    added_by = "Неизвестно"
+    added_by = _UNKNOWN_ADMIN
     if channel.admin:
-        added_by = channel.admin.first_name or f"ID: {channel.added_by}"
-        if channel.admin.username:
-            added_by += f" (@{channel.admin.username})"
+        added_by = _added_by_text(channel.admin.first_name, channel.admin.username, channel.added_by)
 
     # Группа обсуждений
     discussion = str(channel.discussion_group_id) if channel.discussion_group_id else "Нет"
 
     # Дата добавления
-    created_at = channel.created_at.strftime("%d.%m.%Y %H:%M") if channel.created_at else "—"
+    created_at = _format_created_at(channel.created_at) if channel.created_at else "—"
 
     # Администраторы канала из Telegram API
-    bot = dialog_manager.middleware_data["bot"]
-    admins_list = ""
     try:
-        admins = await bot.get_chat_administrators(channel_id)
-        admin_lines = []
-        for admin in admins:
-            user = admin.user
-            if user.is_bot:
-                name = f"🤖 {user.first_name or ''}"
-            else:
-                name = f"👤 {user.first_name or ''}"
-            if user.username:
-                name += f" (@{user.username})"
-            role = "владелец" if admin.status == "creator" else "админ"
-            admin_lines.append(f"  {name} — <i>{role}</i>")
-        admins_list = "\n".join(admin_lines) if admin_lines else "Нет данных"
+        admins_list = await admins_task
     except Exception as e:
         admins_list = f"⚠️ Не удалось получить: {e}"
 
-    detail_text = CHANNEL_DETAIL_TEXT.format(
+    detail_text = format_channel_detail(
         name=channel.channel_name,
         username=f"@{channel.channel_username}" if channel.channel_username else "Нет",
         channel_id=channel.channel_id,
@@ -196,9 +257,36 @@ async def channel_info_getter(dialog_manager: DialogManager, **kwargs) -> Dict[s
 #  Handlers — navigation
 # ---------------------------------------------------------------------------
 
+# Сильные ссылки на фоновые задачи хендлеров (ответы на callback, остановка парсинга),
+# чтобы их не собрал GC
+_background_tasks: set = set()
+
+
+def _on_background_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logging.warning(f"Ошибка фоновой задачи {task.get_coro().__qualname__}: {task.exception()}")
+
+
+def _spawn(coro) -> asyncio.Task:
+    """Запускает корутину в фоне, держит ссылку на задачу и логирует её ошибку."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_on_background_done)
+    return task
+
+
+def _ack(callback: CallbackQuery) -> asyncio.Task:
+    """
+    Ответ на callback без ожидания: снимает «часики» с кнопки параллельно
+    с переходом в диалоге, а не перед ним.
+    """
+    return _spawn(callback.answer())
+
+
 async def on_show_channels(callback: CallbackQuery, button: Button, manager: DialogManager) -> None:
     """Переход к списку каналов."""
-    await callback.answer()
+    _ack(callback)
     await manager.switch_to(ChannelDialogStates.VIEW_CHANNELS_LIST)
 
 
@@ -206,42 +294,52 @@ async def on_channel_selected(
     callback: CallbackQuery,
     widget: Select,
     manager: DialogManager,
-    item_id: str,
+    item_id: int,
 ) -> None:
     """Выбор канала для просмотра деталей."""
     await callback.answer()
-    try:
-        manager.dialog_data["selected_channel_id"] = int(item_id)
-    except ValueError:
-        return
+    manager.dialog_data["selected_channel_id"] = item_id
     await manager.switch_to(ChannelDialogStates.VIEW_CHANNEL_INFO)
 
 
 async def go_to_add_by_link(callback: CallbackQuery, button: Button, manager: DialogManager) -> None:
     """Переход к добавлению канала по ссылке."""
-    await callback.answer()
+    _ack(callback)
     await manager.switch_to(ChannelDialogStates.ADD_BY_LINK)
 
 
 async def go_to_add_by_forward(callback: CallbackQuery, button: Button, manager: DialogManager) -> None:
     """Переход к добавлению канала пересылкой."""
-    await callback.answer()
+    _ack(callback)
     await manager.switch_to(ChannelDialogStates.ADD_BY_FORWARD)
 
 
 async def go_to_choose_channel_remove(callback: CallbackQuery, button: Button, manager: DialogManager) -> None:
     """Переход к выбору канала для удаления."""
-    await callback.answer()
-    data = await channels_getter(manager)
-    if not data["channels"]:
+    # Только COUNT(*): сам список загрузит геттер окна выбора.
+    # На callback отвечаем один раз: alert при пустом списке, иначе — без ожидания
+    if not await channels_count():
         await callback.answer("Нет каналов для удаления", show_alert=True)
         return
+    _ack(callback)
     await manager.switch_to(ChannelDialogStates.CHOOSE_CHANNEL_TO_REMOVE)
 
 
+async def _back_to_main(callback: CallbackQuery, button: Button, manager: DialogManager) -> None:
+    """Назад в меню управления каналами."""
+    _ack(callback)
+    await manager.switch_to(ChannelDialogStates.MAIN_MENU)
+
+
+async def _back_to_channels_list(callback: CallbackQuery, button: Button, manager: DialogManager) -> None:
+    """Назад к списку каналов."""
+    _ack(callback)
+    await manager.switch_to(ChannelDialogStates.VIEW_CHANNELS_LIST)
+
+
 async def go_back_to_admin_main(callback: CallbackQuery, button: Button, manager: DialogManager) -> None:
     """Назад в главное админ-меню."""
-    await callback.answer()
+    _ack(callback)
     await manager.start(AdminStates.MAIN_MENU, mode=StartMode.RESET_STACK)
 
 
@@ -249,28 +347,47 @@ async def go_back_to_admin_main(callback: CallbackQuery, button: Button, manager
 #  Handlers — add channel
 # ---------------------------------------------------------------------------
 
+@cached_with_ttl(
+    ttl=60,
+    key_builder=lambda f, bot, chat_id: f"{f.__qualname__}:{bot.id}:{chat_id}",
+    skip_cache_func=lambda is_admin: not is_admin,
+)
+async def _bot_is_admin(bot, chat_id: int) -> bool:
+    """
+    Является ли бот администратором канала. Положительный ответ кэшируется на 60 секунд,
+    чтобы повторные добавления подряд не тратили лимит запросов на get_chat_member.
+    Отрицательный не кэшируется: после выдачи прав боту повторная попытка сразу проходит.
+    Ошибки Telegram не кэшируются и пробрасываются вызывающему.
+    """
+    async with _BOT_API_SEM:
+        member = await bot.get_chat_member(chat_id, bot.id)
+    return member.status in _BOT_ADMIN_STATUSES
+
+
 async def on_add_channel_by_link(message: Message, widget: MessageInput, manager: DialogManager) -> None:
     """Добавление канала по ссылке/username."""
-    channel_input = (message.text or "").strip()
-    success, result_message = await add_channel_by_username(
-        channel_username=channel_input,
+    # Некорректный ввод отсекаем сразу, без запросов к Telegram и БД
+    match = _CHANNEL_INPUT_RE.match((message.text or "").strip())
+    if not match:
+        await message.answer(MESSAGES["invalid_channel_link"])
+        return
+
+    clean = match["username"]
+    success, result_message, chat_info = await add_channel_by_username(
+        channel_username=clean,
         bot=message.bot,
         added_by=message.from_user.id,
+        api_limiter=_BOT_API_SEM,
     )
     if not result_message:
         result_message = "✅ Канал добавлен!" if success else "❌ Ошибка при добавлении канала."
 
     await message.answer(result_message)
     if success:
-        # Получаем инфо о канале для парсинга
-        clean = channel_input.replace("@", "").replace("https://t.me/", "").replace("http://t.me/", "")
-        try:
-            chat = await message.bot.get_chat(f"@{clean}")
-            manager.dialog_data["parse_channel_id"] = chat.id
-            manager.dialog_data["parse_channel_name"] = chat.title or clean
-            await manager.switch_to(ChannelDialogStates.ASK_PARSE)
-        except Exception:
-            await manager.switch_to(ChannelDialogStates.MAIN_MENU)
+        # Канал уже получен в add_channel_by_username — повторный get_chat не нужен
+        manager.dialog_data["parse_channel_id"] = chat_info["id"]
+        manager.dialog_data["parse_channel_name"] = chat_info["title"] or clean
+        await manager.switch_to(ChannelDialogStates.ASK_PARSE)
 
 
 async def on_add_channel_by_forward(message: Message, widget: MessageInput, manager: DialogManager) -> None:
@@ -280,19 +397,37 @@ async def on_add_channel_by_forward(message: Message, widget: MessageInput, mana
         return
 
     channel = message.forward_from_chat
-    if channel.type != "channel":
+    if channel.type != ChatType.CHANNEL:
         await message.answer("❌ Это не канал!")
         return
 
+    # Права бота запрашиваем у Telegram параллельно с проверкой канала в БД:
+    # уже добавленный канал отвечаем сразу, не дожидаясь сетевого запроса
+    bot_member_task = asyncio.create_task(_bot_is_admin(message.bot, channel.id))
+    try:
+        exists = await channel_exists(channel.id)
+    except BaseException:
+        bot_member_task.cancel()
+        raise
+    if exists:
+        bot_member_task.cancel()
+        await message.answer(MESSAGES["channel_already_exists"])
+        return
+
     # Проверяем, является ли бот администратором канала
     try:
-        bot_member = await message.bot.get_chat_member(channel.id, message.bot.id)
-        if bot_member.status not in ["administrator", "creator"]:
+        if not await bot_member_task:
             await message.answer(MESSAGES["bot_not_admin"])
             return
-    except Exception:
+    except (TelegramBadRequest, TelegramForbiddenError):
+        # Бот не в канале или у него нет доступа к списку участников
         await message.answer(MESSAGES["bot_not_admin"])
         return
+    except Exception:
+        # Таймаут/сетевая ошибка — не выдаём её за отсутствие прав
+        logging.exception(f"Не удалось проверить права бота в канале {channel.id}")
+        await message.answer(MESSAGES["error_occurred"])
+        return
 
     success = await add_channel(
         channel_id=channel.id,
@@ -314,26 +449,34 @@ async def on_add_channel_by_forward(message: Message, widget: MessageInput, mana
 #  Handlers — remove channel
 # ---------------------------------------------------------------------------
 
+# channel_id каналов, удаление которых уже выполняется: повторное нажатие на ту же
+# кнопку не запускает второй DELETE и не дублирует сообщение об удалении
+_removals_in_progress: Set[int] = set()
+
+
 async def on_remove_channel_selected(
     callback: CallbackQuery,
     widget: Select,
     manager: DialogManager,
-    item_id: str,
+    item_id: int,
 ) -> None:
-    """Удаление выбранного канала."""
-    try:
-        channel_id = int(item_id)
-    except ValueError:
-        await callback.answer("Некорректный канал", show_alert=True)
+    """Удаление выбранного канала (item_id уже приведён к int виджетом Select)."""
+    # Отвечаем на callback сразу, не дожидаясь удаления
+    _ack(callback)
+    if item_id in _removals_in_progress:
         return
 
-    success = await remove_channel(channel_id)
-    if success:
-        await callback.message.answer(MESSAGES["channel_removed"])
-    else:
-        await callback.message.answer(MESSAGES["error_occurred"])
+    _removals_in_progress.add(item_id)
+    try:
+        # Канала нет — его уже удалили (нажатие на устаревшую клавиатуру)
+        text = MESSAGES["channel_removed" if await remove_channel(item_id) else "channel_already_removed"]
+    except Exception as e:
+        logging.error(f"Ошибка при удалении канала {item_id}: {e}")
+        text = MESSAGES["error_occurred"]
+    finally:
+        _removals_in_progress.discard(item_id)
 
-    await callback.answer()
+    await callback.message.answer(text)
     await manager.switch_to(ChannelDialogStates.MAIN_MENU)
 
 
@@ -341,6 +484,47 @@ async def on_remove_channel_selected(
 #  Handlers — parsing
 # ---------------------------------------------------------------------------
 
+# Все ключи dialog_data, которые заводит парсинг (очищаются при возврате в меню)
+_PARSING_KEYS = frozenset({
+    "parse_channel_id", "parse_channel_name",
+    "parsed", "total", "with_username", "without_username",
+    "bots_count", "added", "updated", "parsing_cancelled",
+    "parsing_error", "_parser", "_parsing_task", "_parsing_done",
+})
+
+# Сколько пачек подписчиков может одновременно записываться в БД во время парсинга
+_PARSING_DB_WRITERS = 4
+
+# Сколько ждать кооперативной остановки парсинга перед отменой задачи (секунды)
+_PARSING_STOP_TIMEOUT = 2.0
+
+# Минимальный интервал (секунды) между обновлениями окна прогресса парсинга
+_PROGRESS_UPDATE_INTERVAL = 1.5
+
+
+async def _apply_progress_updates(progress: asyncio.Queue, bg_manager) -> None:
+    """Применяет снимки прогресса парсинга к окну, не чаще раза в _PROGRESS_UPDATE_INTERVAL."""
+    while True:
+        snapshot = await progress.get()
+        try:
+            await bg_manager.update(snapshot, show_mode=ShowMode.EDIT)
+        except Exception as e:
+            logging.warning(f"Не удалось обновить прогресс: {e}")
+        await asyncio.sleep(_PROGRESS_UPDATE_INTERVAL)
+
+
+def _saved_counters(saved: List[Any], channel_name: str) -> Dict[str, int]:
+    """Суммы added/updated по результатам записи пачек (gather с return_exceptions); ошибки логируются."""
+    added = updated = 0
+    for result in saved:
+        if isinstance(result, BaseException):
+            logging.error(f"Ошибка записи подписчиков канала {channel_name}: {result}")
+            continue
+        added += result[0]
+        updated += result[1]
+    return {"added": added, "updated": updated}
+
+
 async def _run_parsing_task(
     bg_manager,
     channel_id: int,
@@ -348,40 +532,59 @@ async def _run_parsing_task(
     pyro_client,
 ) -> None:
     """Фоновая задача парсинга подписчиков."""
-    from pyrogram_app.parsing_mode import ParsingMode
-
     app = pyro_client.app
     parser = ParsingMode(app)
 
     # Сохраняем parser для возможности отмены
     await bg_manager.update({"_parser": parser}, show_mode=ShowMode.NO_UPDATE)
 
+    # Парсер только кладёт снимок прогресса в очередь и не ждёт Telegram;
+    # отдельная задача применяет последний снимок не чаще раза в _PROGRESS_UPDATE_INTERVAL
+    progress: asyncio.Queue = asyncio.Queue(maxsize=1)
+    # Последний снимок — для итогов, если задачу отменят до возврата из парсера
+    last_progress: Dict[str, Any] = {}
+
     async def progress_callback(stats, total):
-        try:
-            await bg_manager.update(
-                {
-                    "parsed": stats.total_processed,
-                    "total": total,
-                    "with_username": stats.with_username,
-                    "without_username": stats.without_username,
-                    "bots_count": stats.bots_count,
-                },
-                show_mode=ShowMode.EDIT,
-            )
-        except Exception as e:
-            logging.warning(f"Не удалось обновить прогресс: {e}")
+        if progress.full():
+            progress.get_nowait()  # неприменённый старый снимок вытесняется новым
+        last_progress.update(
+            parsed=stats.total_processed,
+            total=total,
+            with_username=stats.with_username,
+            without_username=stats.without_username,
+            bots_count=stats.bots_count,
+        )
+        progress.put_nowait(dict(last_progress))
+
+    progress_consumer = asyncio.create_task(_apply_progress_updates(progress, bg_manager))
+
+    # Подписчики пишутся в БД пачками параллельно с парсингом, а не одним списком в конце
+    writers = asyncio.Semaphore(_PARSING_DB_WRITERS)
+    pending: List[asyncio.Task] = []
+
+    async def save_batch(batch):
+        async with writers:
+            return await bulk_add_channel_subscribers(channel_id, batch)
+
+    async def batch_callback(batch):
+        pending.append(asyncio.create_task(save_batch(batch)))
 
     try:
-        subscribers, stats = await parser.parse_full_batched(
-            channel_id=channel_id,
-            batch_size=200,
-            progress_callback=progress_callback,
-        )
+        try:
+            _, stats = await parser.parse_full_batched(
+                channel_id=channel_id,
+                batch_size=200,
+                progress_callback=progress_callback,
+                batch_callback=batch_callback,
+            )
+        finally:
+            # Дальше окно обновляется итоговыми данными — промежуточный прогресс не нужен
+            progress_consumer.cancel()
 
-        # Сохраняем подписчиков в БД
-        added, updated = 0, 0
-        if subscribers:
-            added, updated = await bulk_add_channel_subscribers(channel_id, subscribers)
+        # shield: отмена задачи парсинга не должна обрывать запись уже собранных пачек
+        saved = await asyncio.shield(asyncio.gather(*pending))
+        added = sum(batch_added for batch_added, _ in saved)
+        updated = sum(batch_updated for _, batch_updated in saved)
 
         cancelled = parser._stop_event.is_set()
         await bg_manager.update(
@@ -405,8 +608,30 @@ async def _run_parsing_task(
         except Exception as e:
             logging.warning(f"Не удалось переключить на результаты: {e}")
 
+    except asyncio.CancelledError:
+        # Отмена по таймауту остановки (_wait_parsing_stopped): запущенные записи пачек
+        # дожидаемся, а окно результатов получает итоговые счётчики по последнему снимку
+        saved = await asyncio.shield(asyncio.gather(*pending, return_exceptions=True))
+        await bg_manager.update(
+            {
+                **last_progress,
+                "total": last_progress.get("parsed", 0),
+                **_saved_counters(saved, channel_name),
+                "parsing_cancelled": True,
+                "_parsing_done": True,
+            },
+            show_mode=ShowMode.NO_UPDATE,
+        )
+        try:
+            await bg_manager.switch_to(ChannelDialogStates.PARSING_COMPLETE)
+        except Exception as e:
+            logging.warning(f"Не удалось переключить на результаты: {e}")
+        raise
+
     except Exception as e:
         logging.error(f"Ошибка парсинга канала {channel_name}: {e}")
+        # Уже собранные пачки дописываем, не оставляя задач без ожидания
+        _saved_counters(await asyncio.gather(*pending, return_exceptions=True), channel_name)
         await bg_manager.update(
             {
                 "parsing_cancelled": True,
@@ -434,7 +659,6 @@ async def on_start_parsing(callback: CallbackQuery, button: Button, manager: Dia
         return
 
     # Получаем pyrogram клиент
-    from pyrogram_app.pyro_client import get_pyrogram_client
     try:
         pyro_client = get_pyrogram_client()
     except RuntimeError:
@@ -467,6 +691,14 @@ async def on_skip_parsing(callback: CallbackQuery, button: Button, manager: Dial
     await manager.switch_to(ChannelDialogStates.MAIN_MENU)
 
 
+async def _wait_parsing_stopped(task: asyncio.Task) -> None:
+    """Даёт парсеру остановиться самому; по таймауту wait_for отменяет задачу."""
+    try:
+        await asyncio.wait_for(task, timeout=_PARSING_STOP_TIMEOUT)
+    except asyncio.TimeoutError:
+        logging.warning("Парсинг не остановился вовремя, задача отменена")
+
+
 async def on_cancel_parsing(callback: CallbackQuery, button: Button, manager: DialogManager) -> None:
     """Отмена парсинга."""
     await callback.answer("Отмена парсинга...")
@@ -476,14 +708,11 @@ async def on_cancel_parsing(callback: CallbackQuery, button: Button, manager: Di
     if parser:
         parser.stop()
 
-    # Отменяем задачу если ещё выполняется
+    # Остановку ждём в фоне: хендлер сразу показывает результаты, а задача парсинга,
+    # завершившись, обновит их итоговыми счётчиками
     task = manager.dialog_data.get("_parsing_task")
     if task and not task.done():
-        # Даём парсеру время остановиться
-        try:
-            await asyncio.wait_for(task, timeout=5.0)
-        except asyncio.TimeoutError:
-            task.cancel()
+        _spawn(_wait_parsing_stopped(task))
 
     manager.dialog_data["parsing_cancelled"] = True
     await manager.switch_to(ChannelDialogStates.PARSING_COMPLETE)
@@ -493,13 +722,9 @@ async def on_parsing_back_to_menu(callback: CallbackQuery, button: Button, manag
     """Возврат в меню после парсинга."""
     await callback.answer()
     # Чистим данные парсинга
-    for key in list(manager.dialog_data.keys()):
-        if key.startswith("parse_") or key.startswith("_pars") or key in (
-            "parsed", "total", "with_username", "without_username",
-            "bots_count", "added", "updated", "parsing_cancelled",
-            "parsing_error", "_parser", "_parsing_task", "_parsing_done",
-        ):
-            manager.dialog_data.pop(key, None)
+    dialog_data = manager.dialog_data
+    for key in _PARSING_KEYS:
+        dialog_data.pop(key, None)
     await manager.switch_to(ChannelDialogStates.MAIN_MENU)
 
 
@@ -538,7 +763,7 @@ channels_dialog = Dialog(
         Const(MESSAGES["enter_channel_link"]),
         MessageInput(on_add_channel_by_link),
         Row(
-            Button(Const(BUTTONS["back"]), id="back_from_add_link", on_click=lambda c, b, m: m.switch_to(ChannelDialogStates.MAIN_MENU)),
+            Button(Const(BUTTONS["back"]), id="back_from_add_link", on_click=_back_to_main),
         ),
         state=ChannelDialogStates.ADD_BY_LINK,
     ),
@@ -547,22 +772,32 @@ channels_dialog = Dialog(
         Const(MESSAGES["enter_channel_forward"]),
         MessageInput(on_add_channel_by_forward),
         Row(
-            Button(Const(BUTTONS["back"]), id="back_from_add_forward", on_click=lambda c, b, m: m.switch_to(ChannelDialogStates.MAIN_MENU)),
+            Button(Const(BUTTONS["back"]), id="back_from_add_forward", on_click=_back_to_main),
         ),
         state=ChannelDialogStates.ADD_BY_FORWARD,
     ),
     # Выбор канала для удаления
     Window(
         Const(MESSAGES["choose_channel_to_remove"]),
-        Select(
-            Format("{item.channel_name} (@{item.channel_username})" if "{item.channel_username}" else "{item.channel_name}"),
-            id="channel_to_remove_select",
-            item_id_getter=lambda ch: str(ch.channel_id),
-            items="channels",
-            on_click=on_remove_channel_selected,
+        Column(
+            Select(
+                _ChannelTitle(),
+                id="channel_to_remove_select",
+                item_id_getter=lambda ch: str(ch.channel_id),
+                type_factory=int,
+                items="channels",
+                on_click=on_remove_channel_selected,
+            ),
         ),
+        StubScroll(id="channels_remove_scroll", pages="pages"),
         Row(
-            Button(Const(BUTTONS["back"]), id="back_from_remove_channel", on_click=lambda c, b, m: m.switch_to(ChannelDialogStates.MAIN_MENU)),
+            PrevPage(scroll="channels_remove_scroll"),
+            CurrentPage(scroll="channels_remove_scroll", text=Format("{current_page1}/{pages}")),
+            NextPage(scroll="channels_remove_scroll"),
+            when="has_pages",
+        ),
+        Row(
+            Button(Const(BUTTONS["back"]), id="back_from_remove_channel", on_click=_back_to_main),
         ),
         getter=channels_getter,
         state=ChannelDialogStates.CHOOSE_CHANNEL_TO_REMOVE,
@@ -570,16 +805,26 @@ channels_dialog = Dialog(
     # Список каналов (выбор)
     Window(
         Const("📺 <b>Выберите канал для просмотра:</b>"),
-        Select(
-            Format("📺 {item.channel_name}"),
-            id="channel_view_select",
-            item_id_getter=lambda ch: str(ch.channel_id),
-            items="channels",
-            on_click=on_channel_selected,
+        Column(
+            Select(
+                Format("📺 {item.channel_name}"),
+                id="channel_view_select",
+                item_id_getter=lambda ch: str(ch.channel_id),
+                type_factory=int,
+                items="channels",
+                on_click=on_channel_selected,
+            ),
+        ),
+        StubScroll(id="channels_view_scroll", pages="pages"),
+        Row(
+            PrevPage(scroll="channels_view_scroll"),
+            CurrentPage(scroll="channels_view_scroll", text=Format("{current_page1}/{pages}")),
+            NextPage(scroll="channels_view_scroll"),
+            when="has_pages",
         ),
         Row(
             Button(Const(BUTTONS["back"]), id="back_from_channels_list",
-                   on_click=lambda c, b, m: m.switch_to(ChannelDialogStates.MAIN_MENU)),
+                   on_click=_back_to_main),
         ),
         getter=channel_list_getter,
         state=ChannelDialogStates.VIEW_CHANNELS_LIST,
@@ -589,11 +834,11 @@ channels_dialog = Dialog(
         Format("{detail_text}"),
         Row(
             Button(Const(BUTTONS["back"]), id="back_from_channel_info",
-                   on_click=lambda c, b, m: m.switch_to(ChannelDialogStates.VIEW_CHANNELS_LIST)),
+                   on_click=_back_to_channels_list),
         ),
         Row(
             Button(Const(BUTTONS["back_to_menu"]), id="channel_info_to_menu",
-                   on_click=lambda c, b, m: m.switch_to(ChannelDialogStates.MAIN_MENU)),
+                   on_click=_back_to_main),
         ),
         getter=channel_info_getter,
         state=ChannelDialogStates.VIEW_CHANNEL_INFO,
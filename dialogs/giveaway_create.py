@@ -28,7 +28,7 @@ from texts.messages import MESSAGES, GIVEAWAY_POST_TEMPLATE, BUTTONS
 from utils.datetime_utils import parse_datetime, format_datetime, is_future_datetime
 from utils.scheduler import schedule_giveaway_finish
 from utils.keyboards import get_participate_keyboard
-from database.database import get_all_channels, create_giveaway, update_giveaway_message_id, delete_giveaway
+from database.database import get_all_channels_core, create_giveaway, update_giveaway_message_id, delete_giveaway
 
 
 async def on_title(message: Message, widget: MessageInput, manager: DialogManager) -> None:
@@ -103,7 +103,7 @@ async def on_winner_places(message: Message, widget: MessageInput, manager: Dial
     manager.dialog_data["winner_places"] = winner_places
 
     # Проверяем наличие каналов до перехода к выбору
-    channels = await get_all_channels()
+    channels = await get_all_channels_core()
     if not channels:
         await message.answer(
             "❌ Нет доступных каналов! Сначала добавьте каналы в разделе управления каналами.",
@@ -116,7 +116,7 @@ async def on_winner_places(message: Message, widget: MessageInput, manager: Dial
 
 async def channels_getter(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
     """Геттер для списка каналов."""
-    channels = await get_all_channels()
+    channels = await get_all_channels_core()
     return {"channels": channels}
 
 
@@ -155,7 +155,7 @@ async def on_end_time(message: Message, widget: MessageInput, manager: DialogMan
 
     # Подготовка текста подтверждения (аналог process_end_time)
     data = manager.dialog_data
-    channels = await get_all_channels()
+    channels = await get_all_channels_core()
     selected_channel = next(
         (ch for ch in channels if ch.channel_id == data.get("channel_id")),
         None,
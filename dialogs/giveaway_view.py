@@ -1,6 +1,5 @@
 import logging
 from datetime import datetime
-from typing import List
 
 from aiogram.types import CallbackQuery, Message
 from aiogram_dialog import Dialog, Window, DialogManager
@@ -11,15 +10,15 @@ from aiogram_dialog.widgets.kbd import (
 )
 from aiogram_dialog.widgets.text import Format, Const
 
-from database import Giveaway
 from states.admin_states import ViewGiveawaysStates, AdminStates
 from database.database import (
-    get_active_giveaways,
-    get_finished_giveaways_page,
+    get_active_giveaways_with_counts,
+    get_finished_giveaways_keyset,
     count_finished_giveaways,
-    get_giveaway,
+    get_giveaway_summary,
     get_winners,
     update_giveaway_fields,
+    get_session,
 )
 from texts.messages import DETAIL_TEXT
 
@@ -27,16 +26,30 @@ from texts.messages import DETAIL_TEXT
 # ─── Getters ───────────────────────────────────────────────
 
 
+def _encode_cursor(cursor) -> str:
+    """Курсор (end_time, id) → строка для хранения в dialog_data."""
+    end_time, giveaway_id = cursor
+    return f"{end_time.isoformat()}|{giveaway_id}"
+
+
+def _decode_cursor(value):
+    """Строка из dialog_data → курсор (end_time, id) или None для первой страницы."""
+    if not value:
+        return None
+    end_time, giveaway_id = value.split("|")
+    return datetime.fromisoformat(end_time), int(giveaway_id)
+
+
 async def active_giveaways_getter(dialog_manager: DialogManager, **kwargs):
     """Геттер для списка активных розыгрышей"""
-    giveaways = await get_active_giveaways()
+    giveaways = await get_active_giveaways_with_counts()
     items = [
         {
             "id": g.id,
             "title": g.title[:30] if g.title else "",
-            "participants_count": len(g.participants) if g.participants else 0,
+            "participants_count": participants_count,
         }
-        for g in (giveaways or [])
+        for g, participants_count in giveaways
     ]
     return {
         "giveaways": items,
@@ -49,9 +62,16 @@ async def finished_giveaways_getter(dialog_manager: DialogManager, **kwargs):
     page = dialog_manager.dialog_data.get("page", 1)
     page_size = 10
 
-    giveaways: List[Giveaway] = await get_finished_giveaways_page(page, page_size)
+    # Курсоры начала страниц: [None, "end_time|id", ...] — индекс = номер страницы - 1
+    cursors = dialog_manager.dialog_data.setdefault("page_cursors", [None])
+    cursor = _decode_cursor(cursors[page - 1])
+
+    async with get_session(readonly=True) as session:
+        giveaways, next_cursor = await get_finished_giveaways_keyset(cursor, page_size, session=session)
+        total_count = await count_finished_giveaways(session=session)
+    if next_cursor is not None and len(cursors) == page:
+        cursors.append(_encode_cursor(next_cursor))
     logging.debug(f"Получены данные Giveaways: {giveaways}")
-    total_count = await count_finished_giveaways()
     total_pages = (total_count + page_size - 1) // page_size
 
     items = [
@@ -85,7 +105,7 @@ _MAX_MESSAGE_WINNER = 1500
 async def _base_detail_getter(dialog_manager: DialogManager) -> dict:
     """Базовый геттер деталей розыгрыша"""
     giveaway_id = dialog_manager.dialog_data.get("selected_giveaway_id")
-    g = await get_giveaway(giveaway_id)
+    g = await get_giveaway_summary(giveaway_id)
     if not g:
         raise ValueError(f"Розыгрыш с ID '{giveaway_id}' не найден.")
     return {
@@ -95,7 +115,7 @@ async def _base_detail_getter(dialog_manager: DialogManager) -> dict:
         "message_winner": _truncate(g.message_winner or "—", _MAX_MESSAGE_WINNER),
         "status": g.status,
         "channel_name": g.channel.channel_name if g.channel else "—",
-        "participants_count": len(g.participants) if g.participants else 0,
+        "participants_count": g.participants_count,
         "winner_places": g.winner_places,
         "start_time": g.start_time.strftime("%d.%m.%Y %H:%M") if g.start_time else "—",
         "end_time": g.end_time.strftime("%d.%m.%Y %H:%M") if g.end_time else "—",
@@ -130,7 +150,7 @@ async def finished_detail_getter(dialog_manager: DialogManager, **kwargs):
 async def on_giveaway_selected(callback: CallbackQuery, widget, manager: DialogManager, item_id: str):
     """Обработчик выбора розыгрыша — маршрутизация по типу списка"""
     giveaway_id = int(item_id)
-    giveaway = await get_giveaway(giveaway_id)
+    giveaway = await get_giveaway_summary(giveaway_id)
     if not giveaway:
         return
 
@@ -145,7 +165,8 @@ async def on_giveaway_selected(callback: CallbackQuery, widget, manager: DialogM
 async def on_page_change(callback: CallbackQuery, widget, manager: DialogManager, action: str):
     """Обработчик смены страницы"""
     page = manager.dialog_data.get("page", 1)
-    if action == "next":
+    cursors = manager.dialog_data.get("page_cursors", [None])
+    if action == "next" and page < len(cursors):
         page += 1
     elif action == "prev" and page > 1:
         page -= 1
@@ -162,6 +183,7 @@ async def on_show_finished(callback: CallbackQuery, widget, manager: DialogManag
     """Показать завершенные розыгрыши"""
     manager.dialog_data["list_type"] = "finished"
     manager.dialog_data["page"] = 1
+    manager.dialog_data["page_cursors"] = [None]
     await manager.switch_to(ViewGiveawaysStates.VIEWING_FINISHED)
 
 
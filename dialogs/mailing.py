@@ -10,8 +10,7 @@ from aiogram_dialog.widgets.text import Format, Const
 
 from states.admin_states import MailingStates, AdminDialogStates, AdminStates
 from texts.messages import MESSAGES, BUTTONS
-from database.database import (get_all_channels, get_active_subscribers,
-                                 get_all_active_subscribers,
+from database.database import (get_all_channels_core, get_active_subscriber_ids,
                                  get_channel_subscribers_stats, create_mailing,
                                  get_active_mailing, update_mailing_stats,
                                  get_channel)
@@ -29,7 +28,7 @@ _active_mailings: dict[int, MailingMode] = {}
 
 async def channels_getter(dialog_manager: DialogManager, **kwargs):
     """Геттер для получения списка каналов, которыми управляет админ."""
-    channels = await get_all_channels()
+    channels = await get_all_channels_core()
     return {
         "channels": channels
     }
@@ -46,8 +45,7 @@ async def audience_getter(dialog_manager: DialogManager, **kwargs):
         }
 
     # Получаем количество активных за 30 дней
-    active_subscribers = await get_active_subscribers(channel_id, days=30)
-    active_count = len(active_subscribers)
+    active_count = len(await get_active_subscriber_ids(channel_id, days=30))
 
     # Получаем общее количество подписчиков
     stats = await get_channel_subscribers_stats(channel_id)
@@ -241,11 +239,8 @@ async def _run_mailing_task(
 
     try:
         # Получаем список пользователей
-        if audience_type == "active_30d":
-            subs = await get_active_subscribers(mailing.channel_id, days=30)
-        else:
-            subs = await get_all_active_subscribers(mailing.channel_id)
-        user_ids = [sub.user_id for sub in subs]
+        days = 30 if audience_type == "active_30d" else None
+        user_ids = await get_active_subscriber_ids(mailing.channel_id, days=days)
 
         # Обновляем статус — рассылка начинается
         await update_mailing_stats(
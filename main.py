@@ -10,6 +10,7 @@ from aiogram_dialog import setup_dialogs
 
 from config import config
 from database.database import init_db
+from database.cache import prewarm
 from handlers import setup_handlers
 from middlewares.auth import AdminMiddleware
 from middlewares.pyro import PyrogramMiddleware
@@ -29,7 +30,7 @@ async def main():
             logging.StreamHandler(sys.stdout)
         ]
     )
-    pyro = setup_pyrogram(config)
+    pyro = setup_pyrogram(config.pyrogram)
     await pyro.start()  # 🔥 Запускаем сразу
     # Инициализация бота и диспетчера
     bot = Bot(
@@ -52,6 +53,9 @@ async def main():
     
     # Инициализация базы данных
     await init_db()
+
+    # Прогрев кэшированных запросов к БД в фоне
+    prewarm.start()
     
     # Настройка middleware для проверки админов
     dp.message.middleware(AdminMiddleware())
@@ -75,6 +79,7 @@ async def main():
             allowed_updates=["message", "callback_query", "chat_member", "message_reaction"]
         )
     finally:
+        await prewarm.stop()
         await bot.session.close()
         if pyro.is_running:
             await pyro.stop()
@@ -32,12 +32,15 @@ class AdminMiddleware(BaseMiddleware):
                 return await handler(event, data)
             
             # Для остальных действий проверяем админские права
-            if await is_admin(user.id):
-                # Актуализируем профиль админа (username/first_name)
+            # (проверка — через пул чтения: не ждёт пишущее соединение, занятое, например, парсингом)
+            admin = await is_admin(user.id)
+            if admin:
+                # Актуализируем профиль админа (username/first_name) — сессия записи только для админов
                 try:
                     await update_admin_profile(user)
                 except Exception:
                     pass
+            if admin:
                 # Если админ - продолжаем обработку
                 return await handler(event, data)
             else:
@@ -12,7 +12,7 @@ pyrogram_app - Модуль для работы с Telegram User Bot через
     from pyrogram_app.mailing_mode import MailingMode
     
     # Инициализация
-    pyro = setup_pyrogram(config)
+    pyro = setup_pyrogram(config.pyrogram)
     await pyro.start()
     
     # Получение клиента
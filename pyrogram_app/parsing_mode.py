@@ -394,6 +394,7 @@ class ParsingMode:
         channel_id: int,
         batch_size: int = 200,
         progress_callback: Optional[Callable] = None,
+        batch_callback: Optional[Callable] = None,
     ) -> Tuple[List[Dict], ParsingStats]:
         """
         Полный парсинг с батчевой обработкой, прогрессом и возможностью отмены.
@@ -402,6 +403,9 @@ class ParsingMode:
             channel_id: ID канала
             batch_size: Размер пакета (по умолчанию 200 — размер страницы API)
             progress_callback: async callback(stats, total) для обновления прогресса
+            batch_callback: async callback(batch) — получает подписчиков пачками по мере
+                парсинга (например, для записи в БД параллельно с парсингом); в этом
+                случае подписчики не накапливаются и возвращаемый список пуст
 
         Returns:
             Tuple[List[Dict], ParsingStats]: (список подписчиков, статистика)
@@ -441,8 +445,12 @@ class ParsingMode:
                     else:
                         stats.without_username += 1
 
-                # Каждые batch_size — прогресс, проверка стопа, пауза
+                # Каждые batch_size — пачка подписчиков, прогресс, проверка стопа, пауза
                 if stats.total_processed % batch_size == 0:
+                    if batch_callback and subscribers:
+                        await batch_callback(subscribers)
+                        subscribers = []
+
                     if progress_callback:
                         try:
                             await progress_callback(stats, total)
@@ -466,9 +474,14 @@ class ParsingMode:
 
         stats.end_time = datetime.now()
 
+        # Остаток последней неполной пачки
+        if batch_callback and subscribers:
+            await batch_callback(subscribers)
+            subscribers = []
+
         self.logger.info(
             f"Батчевый парсинг канала {channel_id} завершён: "
-            f"собрано={len(subscribers)}, ботов={stats.bots_count}, "
+            f"собрано={stats.with_username + stats.without_username}, ботов={stats.bots_count}, "
             f"обработано={stats.total_processed}"
         )
 
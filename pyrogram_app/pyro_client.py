@@ -152,5 +152,5 @@ def get_pyrogram_client() -> PyrogramClient:
     Получить готовый запущенный клиент (удобно для использования в других модулях).
     """
     if _instance is None:
-        raise RuntimeError("PyrogramClient ещё не инициализирован. Вызовите setup_pyrogram(config) сначала.")
+        raise RuntimeError("PyrogramClient ещё не инициализирован. Вызовите setup_pyrogram(config.pyrogram) сначала.")
     return _instance
\ No newline at end of file
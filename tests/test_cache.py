@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import pytest
+
+from database.cache import FastMemCache, Prewarmer, cached_with_ttl, _fast_key
+
+
+@pytest.mark.asyncio
+async def test_fast_mem_cache_set_get():
+    """Тест записи и чтения значения"""
+    cache = FastMemCache()
+    await cache.set("key", [1, 2, 3], ttl=10)
+
+    assert await cache.get("key") == [1, 2, 3]
+    assert await cache.exists("key")
+
+
+@pytest.mark.asyncio
+async def test_fast_mem_cache_expired_entry():
+    """Тест: просроченная запись не возвращается и удаляется"""
+    cache = FastMemCache()
+    await cache.set("key", "value", ttl=0.01)
+    await asyncio.sleep(0.02)
+
+    assert await cache.get("key") is None
+    assert "key" not in cache._cache
+
+
+@pytest.mark.asyncio
+async def test_fast_mem_cache_delete_and_clear():
+    """Тест удаления ключа и очистки кэша"""
+    cache = FastMemCache()
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+
+    assert await cache.delete("a") == 1
+    assert await cache.get("a") is None
+
+    await cache.clear()
+    assert await cache.get("b") is None
+
+
+@pytest.mark.asyncio
+async def test_cached_with_ttl_uses_fast_mem_cache():
+    """Тест: декоратор кэширует результат корутины"""
+    calls = []
+
+    @cached_with_ttl(ttl=10)
+    async def double(x):
+        calls.append(x)
+        return x * 2
+
+    assert await double(2) == 4
+    assert await double(2) == 4
+    assert calls == [2]
+    assert isinstance(double.cache, FastMemCache)
+
+
+@pytest.mark.asyncio
+async def test_prewarmer_refreshes_cached_value():
+    """Тест: прогрев вызывает функцию в обход чтения из кэша"""
+    calls = []
+
+    @cached_with_ttl(ttl=10)
+    async def load(x):
+        calls.append(x)
+        return len(calls)
+
+    prewarmer = Prewarmer()
+    prewarmer.register(load, args_iter=[(1,)], ttl=10)
+    prewarmer.start()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    await prewarmer.stop()
+
+    assert calls == [1]
+    assert await load(1) == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_with_ttl_read_since():
+    """Тест: read_since отмечает чтения, но не обновления в обход кэша"""
+    @cached_with_ttl(ttl=10)
+    async def load(x):
+        return x
+
+    started = time.monotonic()
+    await load(1, cache_read=False)
+    assert not load.read_since(started, 1)
+
+    await load(1)
+    assert load.read_since(started, 1)
+    assert not load.read_since(started, 2)
+
+
+def test_fast_key_depends_on_args():
+    """Тест: ключ зависит от функции и аргументов, но не от порядка kwargs"""
+    async def load(*args, **kwargs):
+        return None
+
+    assert _fast_key(load, 1, a=1, b=2) == _fast_key(load, 1, b=2, a=1)
+    assert _fast_key(load, 1) != _fast_key(load, 2)
+    assert _fast_key(load, 1).startswith(f"{load.__module__}.{load.__qualname__}:")
+
+
+@pytest.mark.asyncio
+async def test_cached_with_ttl_single_flight():
+    """Тест: параллельные промахи по одному ключу выполняют функцию один раз"""
+    calls = []
+
+    @cached_with_ttl(ttl=10)
+    async def load(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x * 10
+
+    results = await asyncio.gather(*(load(1) for _ in range(5)))
+
+    assert results == [10] * 5
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_cached_with_ttl_invalidate():
+    """Тест: invalidate сбрасывает значение и не даёт записать устаревший результат"""
+    calls = []
+
+    @cached_with_ttl(ttl=10)
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    assert await load() == 1
+    await load.invalidate()
+    assert await load() == 2
+
+    # Инвалидация во время заполнения: результат не попадает в кэш
+    pending = asyncio.create_task(load(cache_read=False))
+    await asyncio.sleep(0)
+    await load.invalidate()
+    assert await pending == 3
+    assert await load() == 4
@@ -1,14 +1,51 @@
 import pytest
-from datetime import datetime, timezone
+import pytest_asyncio
+from datetime import datetime, timedelta, timezone
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
 from unittest.mock import AsyncMock, MagicMock
 
 from database.database import (
     bulk_add_channel_subscribers,
     get_channel_subscribers_stats,
-    clear_channel_subscribers
+    clear_channel_subscribers,
+    add_admin,
+    remove_admin,
+    get_all_admins_core,
+    update_admin_profile,
+    get_admin_by_username,
+    get_finished_giveaways_keyset,
+    get_active_giveaways,
+    add_participant,
+    get_participants_count,
+    add_winner,
+    add_channel,
+    remove_channel,
+    channel_exists,
+    channels_count,
+    get_all_channels_core,
 )
-from database.models import ChannelSubscriber, Channel
+from database.models import Base, ChannelSubscriber, Channel, Giveaway, GiveawayStatus, Admin
+from sqlalchemy.exc import InvalidRequestError
+from dialogs.giveaway_view import _encode_cursor, _decode_cursor, on_page_change
+
+
+@pytest.fixture(autouse=True)
+def use_mock_sqlite():
+    """Тесты этого модуля работают с настоящей in-memory SQLite — без мока aiosqlite из conftest"""
+    yield
+
+
+@pytest_asyncio.fixture
+async def db_session():
+    """Сессия чистой in-memory SQLite; передаётся в функции database.database через session="""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
 
 
 @pytest.fixture
@@ -361,3 +398,210 @@ async def test_bulk_add_channel_subscribers_large_batch(
 
 # Импортируем func для использования в тестах
 from sqlalchemy import func
+
+
+@pytest.mark.asyncio
+async def test_get_admin_by_username_ignores_case(db_session):
+    """Тест: поиск админа по username не зависит от регистра, как в Telegram"""
+    await add_admin(user_id=1001, username="JohnDoe", session=db_session)
+
+    admin = await get_admin_by_username("johndoe", session=db_session)
+
+    assert admin is not None
+    assert admin.user_id == 1001
+    assert await get_admin_by_username("janedoe", session=db_session) is None
+
+
+async def _add_finished_giveaways(session, end_times):
+    """Создаёт завершённые розыгрыши с заданными end_time; возвращает их id по порядку"""
+    giveaways = [
+        Giveaway(title=f"G{i}", description="", end_time=end_time, status=GiveawayStatus.FINISHED.value)
+        for i, end_time in enumerate(end_times)
+    ]
+    session.add_all(giveaways)
+    await session.commit()
+    return [g.id for g in giveaways]
+
+
+async def _all_keyset_pages(session, page_size):
+    """Проходит все страницы keyset-пагинации; возвращает id по страницам"""
+    pages, cursor = [], None
+    while True:
+        giveaways, cursor = await get_finished_giveaways_keyset(cursor, page_size, session=session)
+        pages.append([g.id for g in giveaways])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.asyncio
+async def test_finished_giveaways_keyset_pages(db_session):
+    """Тест: первая, средняя и последняя неполная страницы по убыванию end_time"""
+    base = datetime(2024, 1, 1)
+    ids = await _add_finished_giveaways(db_session, [base + timedelta(days=i) for i in range(5)])
+    newest_first = ids[::-1]
+
+    first, cursor = await get_finished_giveaways_keyset(None, 2, session=db_session)
+    assert [g.id for g in first] == newest_first[:2]
+    assert cursor == (first[-1].end_time, first[-1].id)
+
+    middle, cursor = await get_finished_giveaways_keyset(cursor, 2, session=db_session)
+    assert [g.id for g in middle] == newest_first[2:4]
+
+    last, cursor = await get_finished_giveaways_keyset(cursor, 2, session=db_session)
+    assert [g.id for g in last] == newest_first[4:]
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_finished_giveaways_keyset_exact_multiple(db_session):
+    """Тест: при числе розыгрышей, кратном размеру страницы, у последней страницы нет курсора"""
+    base = datetime(2024, 1, 1)
+    await _add_finished_giveaways(db_session, [base + timedelta(days=i) for i in range(4)])
+
+    pages = await _all_keyset_pages(db_session, 2)
+
+    assert [len(page) for page in pages] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_finished_giveaways_keyset_ties_on_end_time(db_session):
+    """Тест: розыгрыши с одинаковым end_time не теряются и не повторяются на границе страниц"""
+    same = datetime(2024, 1, 1)
+    ids = await _add_finished_giveaways(db_session, [same] * 5)
+
+    pages = await _all_keyset_pages(db_session, 2)
+
+    assert [gid for page in pages for gid in page] == sorted(ids, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_finished_giveaways_keyset_skips_active(db_session):
+    """Тест: в выборку попадают только завершённые розыгрыши"""
+    db_session.add(Giveaway(title="A", description="", end_time=datetime(2024, 1, 1),
+                            status=GiveawayStatus.ACTIVE.value))
+    ids = await _add_finished_giveaways(db_session, [datetime(2024, 1, 2)])
+
+    giveaways, cursor = await get_finished_giveaways_keyset(None, 10, session=db_session)
+
+    assert [g.id for g in giveaways] == ids
+    assert cursor is None
+
+
+def test_giveaway_cursor_roundtrip():
+    """Тест: курсор (end_time, id) переживает сохранение в dialog_data"""
+    cursor = (datetime(2024, 5, 17, 12, 30, 15, 123456), 42)
+
+    assert _decode_cursor(_encode_cursor(cursor)) == cursor
+    assert _decode_cursor(None) is None
+
+
+@pytest.mark.asyncio
+async def test_on_page_change_bounded_by_known_cursors():
+    """Тест: вперёд — только на страницы с известным курсором, назад — не раньше первой"""
+    manager = MagicMock()
+    manager.dialog_data = {"page": 1, "page_cursors": [None, "2024-01-01T00:00:00|5"]}
+
+    await on_page_change(None, None, manager, "next")
+    assert manager.dialog_data["page"] == 2
+
+    await on_page_change(None, None, manager, "next")
+    assert manager.dialog_data["page"] == 2
+
+    await on_page_change(None, None, manager, "prev")
+    await on_page_change(None, None, manager, "prev")
+    assert manager.dialog_data["page"] == 1
+
+
+@pytest.mark.asyncio
+async def test_add_admin_duplicate_returns_false(db_session):
+    """Тест: повторное добавление админа с тем же user_id возвращает False и не создаёт дубль"""
+    assert await add_admin(user_id=2001, username="admin1", session=db_session) is True
+    assert await add_admin(user_id=2001, username="other", session=db_session) is False
+
+    rows = (await db_session.execute(select(Admin).where(Admin.user_id == 2001))).scalars().all()
+    assert [a.username for a in rows] == ["admin1"]
+
+
+@pytest.mark.asyncio
+async def test_admin_changes_invalidate_admins_list(db_session):
+    """Тест: add_admin, update_admin_profile и remove_admin сбрасывают кэш get_all_admins_core"""
+    await get_all_admins_core.invalidate()
+    assert await get_all_admins_core(session=db_session) == []
+
+    await add_admin(user_id=2002, username="admin2", first_name="Old", session=db_session)
+    assert [(r.user_id, r.first_name) for r in await get_all_admins_core(session=db_session)] == [(2002, "Old")]
+
+    user = MagicMock(id=2002, username="admin2", first_name="New", last_name=None, full_name="New")
+    await update_admin_profile(user, session=db_session)
+    assert [r.first_name for r in await get_all_admins_core(session=db_session)] == ["New"]
+
+    assert await remove_admin(2002, session=db_session) is True
+    assert await get_all_admins_core(session=db_session) == []
+    await get_all_admins_core.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_remove_admin_keeps_main_admin(db_session):
+    """Тест: главного админа удалить нельзя"""
+    db_session.add(Admin(user_id=2003, is_main_admin=True))
+    await db_session.commit()
+
+    assert await remove_admin(2003, session=db_session) is False
+    assert await remove_admin(2004, session=db_session) is False
+
+
+@pytest.mark.asyncio
+async def test_add_participant_duplicate_returns_false(db_session):
+    """Тест: пользователь не может участвовать в розыгрыше дважды"""
+    [giveaway_id] = await _add_finished_giveaways(db_session, [datetime(2024, 1, 1)])
+
+    assert await add_participant(giveaway_id, 3001, session=db_session) is True
+    assert await add_participant(giveaway_id, 3001, session=db_session) is False
+    assert await add_participant(giveaway_id, 3002, session=db_session) is True
+    assert await get_participants_count(giveaway_id, session=db_session) == 2
+
+
+@pytest.mark.asyncio
+async def test_add_winner_duplicate_place_returns_false(db_session):
+    """Тест: одно призовое место не может достаться двум победителям"""
+    [giveaway_id] = await _add_finished_giveaways(db_session, [datetime(2024, 1, 1)])
+
+    assert await add_winner(giveaway_id, 3001, place=1, session=db_session) is True
+    assert await add_winner(giveaway_id, 3002, place=1, session=db_session) is False
+    assert await add_winner(giveaway_id, 3002, place=2, session=db_session) is True
+
+
+@pytest.mark.asyncio
+async def test_add_and_remove_channel(db_session):
+    """Тест: add_channel/remove_channel возвращают False на дубль/отсутствие и сбрасывают кэш списка"""
+    await get_all_channels_core.invalidate()
+    assert await get_all_channels_core(session=db_session) == []
+
+    assert await add_channel(-1001, "Channel", session=db_session) is True
+    assert await add_channel(-1001, "Channel", session=db_session) is False
+    assert await channel_exists(-1001, session=db_session)
+    assert await channels_count(session=db_session) == 1
+    assert [r.channel_id for r in await get_all_channels_core(session=db_session)] == [-1001]
+
+    assert await remove_channel(-1001, session=db_session) is True
+    assert await remove_channel(-1001, session=db_session) is False
+    assert not await channel_exists(-1001, session=db_session)
+    assert await get_all_channels_core(session=db_session) == []
+    await get_all_channels_core.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_get_active_giveaways_without_participants(db_session):
+    """Тест: активные розыгрыши кэшируются без участников — обращение к ним запрещено"""
+    await get_active_giveaways.invalidate()
+    db_session.add(Giveaway(title="A", description="", end_time=datetime(2030, 1, 1),
+                            status=GiveawayStatus.ACTIVE.value))
+    await db_session.commit()
+    db_session.expunge_all()
+
+    [giveaway] = await get_active_giveaways(session=db_session)
+
+    assert giveaway.title == "A"
+    with pytest.raises(InvalidRequestError):
+        giveaway.participants
+    await get_active_giveaways.invalidate()
@@ -1,3 +1,5 @@
+import string
+
 # Основные сообщения бота
 MESSAGES = {
     # Общие сообщения
@@ -68,6 +70,7 @@ MESSAGES = {
     "current_channels": "📺 <b>Добавленные каналы:</b>\n\n{channels}",
     "enter_channel_info": "📺 Выберите способ добавления канала:",
     "enter_channel_link": "🔗 Отправьте ссылку на канал или username канала\n\n<b>Примеры:</b>\n• @channel_name\n• https://t.me/channel_name\n• channel_name\n\n<i>⚠️ Убедитесь, что бот добавлен в канал как администратор!</i>",
+    "invalid_channel_link": "❌ Некорректная ссылка. Отправьте @username канала или ссылку https://t.me/...",
     "enter_channel_forward": "📺 Или перешлите любое сообщение из канала:",
     "confirm_add_channel": "✅ Добавить канал '{channel}' в список?",
     "channel_added": "✅ Канал успешно добавлен!",
@@ -76,6 +79,7 @@ MESSAGES = {
     "choose_channel_to_remove": "📺 Выберите канал для удаления:",
     "confirm_remove_channel": "❌ Удалить канал '{channel}'?",
     "channel_removed": "✅ Канал удален!",
+    "channel_already_removed": "⚠️ Канал уже удален.",
 
     # Парсинг подписчиков
     "channel_added_parsing_prompt": "✅ <b>Канал успешно добавлен!</b>\n\n📺 {channel}\n\nХотите начать парсинг подписчиков для сбора статистики и возможности рассылки победителям?",
@@ -204,6 +208,7 @@ ADMIN_GIVEAWAY_ITEM = "🎯 <b>#{id}</b> {title}\n📅 {end_time} | 👥 {partic
 
 ADMIN_CHANNEL_ITEM = "📺 <b>{name}</b>\n🔗 {username}\n👤 Добавил: {admin}"
 
+
 CHANNEL_DETAIL_TEXT = (
     "📺 <b>{name}</b>\n\n"
     "🔗 Username: {username}\n"
@@ -217,6 +222,28 @@ CHANNEL_DETAIL_TEXT = (
     "{admins_list}"
 )
 
+
+def _compile_template(template: str):
+    """
+    Разбирает шаблон с полями {name} один раз и возвращает функцию подстановки:
+    при вызове — только склейка готовых кусков, без повторного разбора str.format.
+    Поддерживаются простые поля без спецификаторов формата и конверсий.
+    """
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if spec or conversion:
+            raise ValueError(f"Шаблон с форматированием поля не поддерживается: {field}")
+        parts.append((literal, field))
+
+    def render(**fields) -> str:
+        return "".join(literal if field is None else f"{literal}{fields[field]}" for literal, field in parts)
+
+    return render
+
+
+# CHANNEL_DETAIL_TEXT.format(...) с заранее разобранным шаблоном
+format_channel_detail = _compile_template(CHANNEL_DETAIL_TEXT)
+
 ADMIN_USER_ITEM = "👤 <b>{name}</b> (@{username})\n🆔 {user_id}"
 
 DETAIL_TEXT = (
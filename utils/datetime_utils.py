@@ -13,7 +13,7 @@ def parse_datetime(date_string: str) -> datetime:
         dt = datetime.strptime(date_string.strip(), "%d.%m.%Y %H:%M")
         
         # Устанавливаем часовой пояс (Москва)
-        moscow_tz = pytz.timezone(config.TIMEZONE)
+        moscow_tz = config.TZ
         dt_moscow = moscow_tz.localize(dt)
         
         # Конвертируем в UTC
@@ -28,7 +28,7 @@ def format_datetime(dt: datetime) -> str:
     """
     Форматирует datetime в читаемую строку по московскому времени
     """
-    moscow_tz = pytz.timezone(config.TIMEZONE)
+    moscow_tz = config.TZ
     # Если дата наивная, считаем её UTC
     if dt.tzinfo is None:
         dt = pytz.UTC.localize(dt)
@@ -47,5 +47,5 @@ def get_moscow_time() -> datetime:
     """
     Возвращает текущее время в московском часовом поясе
     """
-    moscow_tz = pytz.timezone(config.TIMEZONE)
+    moscow_tz = config.TZ
     return datetime.now(moscow_tz)
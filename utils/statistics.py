@@ -6,11 +6,12 @@ from datetime import datetime, timedelta, timezone
 from typing import Dict, Optional
 
 from database.database import (
-    get_giveaway,
+    get_giveaway_for_report,
     get_participants_count,
     get_active_giveaways,
     get_finished_giveaways,
     get_all_channels,
+    get_channel,
     get_channel_subscribers_count,
 )
 from utils.datetime_utils import format_datetime
@@ -26,7 +27,7 @@ async def generate_giveaway_report(giveaway_id: int) -> Optional[Dict]:
     Returns:
         Словарь с данными отчёта или None, если розыгрыш не найден
     """
-    giveaway = await get_giveaway(giveaway_id)
+    giveaway = await get_giveaway_for_report(giveaway_id)
     if not giveaway:
         return None
 
@@ -97,8 +98,7 @@ async def generate_channel_report(channel_id: int, days: int = 30) -> Optional[D
     start_date = now - timedelta(days=days)
 
     # Получаем канал
-    channels = await get_all_channels()
-    channel = next((c for c in channels if c.channel_id == channel_id), None)
+    channel = await get_channel(channel_id)
     if not channel:
         return None
 